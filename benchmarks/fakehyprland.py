@@ -0,0 +1,348 @@
+'''A stand-in Hyprland for benchmarking hyprdvd without a compositor.
+
+FakeHyprland serves the request socket (.socket.sock) and the event socket
+(.socket2.sock) from a temporary runtime directory. It keeps just enough
+state (monitors, workspaces, clients, cursor, options) to answer the queries
+hyprdvd makes and to apply the dispatches it sends, and it counts requests
+and bytes so benchmarks can report IPC cost per frame.
+'''
+import json
+import os
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+MOVE_RE = re.compile(r'(-?\d+)\s+(-?\d+)\s*,?\s*address:(\S+)')
+
+HYPRCTL_SHIM = '''#!{python}
+# Fake hyprctl: forwards its arguments to the benchmark's request socket.
+import os, socket, sys
+flags, batch, args = '', False, []
+for arg in sys.argv[1:]:
+	if arg in ('-j', '--json'):
+		flags += 'j'
+	elif arg == '--batch':
+		batch = True
+	else:
+		args.append(arg)
+request = ' '.join(args)
+if batch:
+	request = '[[BATCH]]' + request
+elif flags:
+	request = flags + '/' + request
+path = os.path.join(os.environ['XDG_RUNTIME_DIR'], 'hypr', os.environ['HYPRLAND_INSTANCE_SIGNATURE'], '.socket.sock')
+with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+	sock.connect(path)
+	sock.sendall(request.encode())
+	chunks = []
+	while True:
+		chunk = sock.recv(65536)
+		if not chunk:
+			break
+		chunks.append(chunk)
+sys.stdout.write(b''.join(chunks).decode(errors='ignore'))
+'''
+
+
+class FakeHyprland:
+	'''In-process fake of Hyprland's two IPC sockets.'''
+	def __init__(self, monitors=3, width=1920, height=1080, refresh_rate=60.0, signature='hyprdvd-bench', latency=0.0):
+		self.runtime_dir = tempfile.mkdtemp(prefix='hyprdvd-bench-')
+		self.signature = signature
+		self.hypr_dir = os.path.join(self.runtime_dir, 'hypr', signature)
+		os.makedirs(self.hypr_dir)
+		self.request_path = os.path.join(self.hypr_dir, '.socket.sock')
+		self.event_path = os.path.join(self.hypr_dir, '.socket2.sock')
+
+		self.monitors = []
+		for i in range(monitors):
+			self.monitors.append({
+				'id': i,
+				'name': f'FAKE-{i + 1}',
+				'x': i * width,
+				'y': 0,
+				'width': width,
+				'height': height,
+				'scale': 1.0,
+				'transform': 0,
+				'refreshRate': float(refresh_rate),
+				'activeWorkspace': {'id': i + 1, 'name': str(i + 1)},
+				'focused': i == 0,
+			})
+		# Seconds every request takes before it is answered, to model a busy compositor
+		self.latency = latency
+		self.clients = {}
+		self.cursor = (0, 0)
+		self.options = {}
+		self._next_address = 0x1000
+
+		self.lock = threading.Lock()
+		self._pending_events = []
+		self._event_conns = []
+		self._servers = []
+		self._running = False
+		self.reset_stats()
+
+	# -- lifecycle ---------------------------------------------------------
+
+	def environ(self):
+		'''Environment variables that point hyprdvd at this instance.'''
+		return {
+			'XDG_RUNTIME_DIR': self.runtime_dir,
+			'HYPRLAND_INSTANCE_SIGNATURE': self.signature,
+		}
+
+	def start(self):
+		'''Bind both sockets and start serving them on background threads.'''
+		self._running = True
+		for path, target in ((self.request_path, self._serve_requests), (self.event_path, self._serve_events)):
+			server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+			server.bind(path)
+			server.listen(128)
+			self._servers.append(server)
+			threading.Thread(target=target, args=(server,), daemon=True).start()
+		return self
+
+	def stop(self):
+		'''Close all sockets and remove the runtime directory.'''
+		self._running = False
+		for conn in self._event_conns + self._servers:
+			try:
+				conn.close()
+			except OSError:
+				pass
+		self._event_conns = []
+		self._servers = []
+		shutil.rmtree(self.runtime_dir, ignore_errors=True)
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *_):
+		self.stop()
+
+	def write_hyprctl_shim(self, bin_dir=None):
+		'''Write an executable fake `hyprctl` and return the directory holding it.'''
+		bin_dir = bin_dir or os.path.join(self.runtime_dir, 'bin')
+		os.makedirs(bin_dir, exist_ok=True)
+		path = os.path.join(bin_dir, 'hyprctl')
+		with open(path, 'w') as f:
+			f.write(HYPRCTL_SHIM.format(python=sys.executable))
+		os.chmod(path, 0o755)
+		return bin_dir
+
+	# -- state -------------------------------------------------------------
+
+	def reset_stats(self):
+		'''Zero the request, command and byte counters.'''
+		with self.lock:
+			self.requests = 0
+			self.commands = Counter()
+			self.bytes_received = 0
+			self.bytes_sent = 0
+			self.events_sent = 0
+
+	def stats(self):
+		'''Snapshot of the IPC counters.'''
+		with self.lock:
+			return {
+				'requests': self.requests,
+				'commands': sum(self.commands.values()),
+				'bytes_received': self.bytes_received,
+				'bytes_sent': self.bytes_sent,
+				'events_sent': self.events_sent,
+				'by_command': dict(self.commands),
+			}
+
+	def add_client(self, workspace_id, title='', size=(400, 300), at=None, floating=False):
+		'''Create a client on a workspace and return its address (with 0x).'''
+		with self.lock:
+			address = f'0x{self._next_address:x}'
+			self._next_address += 1
+			monitor = self._monitor_for_workspace(workspace_id)
+			if at is None:
+				at = (monitor['x'] if monitor else 0, monitor['y'] if monitor else 0)
+			self.clients[address] = {
+				'address': address,
+				'at': list(at),
+				'size': list(size),
+				'workspace': {'id': workspace_id, 'name': str(workspace_id)},
+				'floating': floating,
+				'monitor': monitor['id'] if monitor else 0,
+				'class': 'bench',
+				'title': title,
+				'focusHistoryID': len(self.clients),
+			}
+		return address
+
+	def open_window(self, workspace_id, title='DVD', **kwargs):
+		'''Add a client and announce it on socket2 like Hyprland does.'''
+		address = self.add_client(workspace_id, title=title, **kwargs)
+		self.emit('openwindow', address[2:], str(workspace_id), 'bench', title)
+		return address
+
+	def close_window(self, address):
+		'''Remove a client and announce it on socket2.'''
+		with self.lock:
+			self.clients.pop(address, None)
+		self.emit('closewindow', address[2:])
+
+	def move_cursor(self, x, y):
+		with self.lock:
+			self.cursor = (x, y)
+
+	def _monitor_for_workspace(self, workspace_id):
+		for monitor in self.monitors:
+			if monitor['activeWorkspace']['id'] == workspace_id:
+				return monitor
+		return None
+
+	# -- socket2 -----------------------------------------------------------
+
+	def emit(self, event, *data):
+		'''Send `event>>data` to every connected socket2 listener.'''
+		line = f'{event}>>{",".join(data)}\n'.encode()
+		for conn in list(self._event_conns):
+			try:
+				conn.sendall(line)
+			except OSError:
+				self._event_conns.remove(conn)
+		with self.lock:
+			self.events_sent += 1
+
+	def listeners(self):
+		'''Number of connected socket2 listeners.'''
+		return len(self._event_conns)
+
+	def _serve_events(self, server):
+		while self._running:
+			try:
+				conn, _ = server.accept()
+			except OSError:
+				return
+			self._event_conns.append(conn)
+
+	# -- request socket ----------------------------------------------------
+
+	def _serve_requests(self, server):
+		while self._running:
+			try:
+				conn, _ = server.accept()
+			except OSError:
+				return
+			with conn:
+				data = self._read_request(conn)
+				if not data:
+					continue
+				if self.latency:
+					time.sleep(self.latency)
+				reply = self.handle(data.decode(errors='ignore')).encode()
+				with self.lock:
+					self.requests += 1
+					self.bytes_received += len(data)
+					self.bytes_sent += len(reply)
+				try:
+					conn.sendall(reply)
+				except OSError:
+					pass
+
+	@staticmethod
+	def _read_request(conn):
+		# Clients send the request in one write and then wait for the reply, so
+		# keep reading only while chunks come back full.
+		conn.settimeout(1.0)
+		data = b''
+		try:
+			while True:
+				chunk = conn.recv(65536)
+				data += chunk
+				if len(chunk) < 65536:
+					break
+				conn.settimeout(0.05)
+		except OSError:
+			pass
+		return data
+
+	def handle(self, request):
+		'''Answer one request payload.'''
+		if request.startswith('[[BATCH]]'):
+			reply = ''.join(self._command(item.strip()) for item in request[len('[[BATCH]]'):].split(';') if item.strip())
+		else:
+			reply = self._command(request)
+
+		# Events caused by dispatches are sent once the state lock is released
+		with self.lock:
+			events, self._pending_events = self._pending_events, []
+		for event in events:
+			self.emit(*event)
+		return reply
+
+	def _command(self, request):
+		json_out = False
+		head, sep, rest = request.partition('/')
+		if sep and head and set(head) <= set('jar'):
+			json_out = 'j' in head
+			request = rest
+
+		parts = request.split(' ', 1)
+		name = parts[0]
+		args = parts[1] if len(parts) > 1 else ''
+		with self.lock:
+			self.commands[name if name != 'dispatch' else 'dispatch ' + args.split(' ', 1)[0]] += 1
+
+			if name == 'clients':
+				return json.dumps(list(self.clients.values()))
+			if name == 'monitors':
+				return json.dumps(self.monitors)
+			if name == 'workspaces':
+				return json.dumps(self._workspaces())
+			if name == 'activeworkspace':
+				return json.dumps(self.monitors[0]['activeWorkspace'])
+			if name == 'cursorpos':
+				return f'{self.cursor[0]}, {self.cursor[1]}'
+			if name == 'getoption':
+				value = self.options.get(args.strip(), 1)
+				if json_out:
+					return json.dumps({'option': args.strip(), 'int': value, 'set': False})
+				return f'int: {value}\nset: false\n'
+			if name == 'keyword':
+				option, _, value = args.partition(' ')
+				self.options[option] = value
+				return 'ok'
+			if name == 'dispatch':
+				return self._dispatch(args)
+		return 'unknown request'
+
+	def _workspaces(self):
+		counts = Counter(c['workspace']['id'] for c in self.clients.values())
+		ids = sorted(set(counts) | {m['activeWorkspace']['id'] for m in self.monitors})
+		return [{'id': i, 'name': str(i), 'windows': counts.get(i, 0)} for i in ids]
+
+	def _dispatch(self, args):
+		dispatcher, _, rest = args.partition(' ')
+		address = rest.split('address:', 1)[1].strip() if 'address:' in rest else None
+		client = self.clients.get(address) if address else None
+
+		if dispatcher in ('movewindowpixel', 'resizewindowpixel'):
+			match = MOVE_RE.search(rest)
+			if not match or client is None:
+				return 'window not found'
+			key = 'at' if dispatcher == 'movewindowpixel' else 'size'
+			client[key] = [int(match.group(1)), int(match.group(2))]
+		elif dispatcher == 'setfloating':
+			if client is None:
+				return 'window not found'
+			client['floating'] = not rest.startswith('no')
+		elif dispatcher == 'settiled':
+			if client is None:
+				return 'window not found'
+			client['floating'] = False
+		elif dispatcher == 'closewindow':
+			if self.clients.pop(address, None) is not None:
+				self._pending_events.append(('closewindow', address[2:]))
+		return 'ok'
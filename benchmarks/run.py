@@ -0,0 +1,266 @@
+'''Benchmark hyprdvd against a fake Hyprland.
+
+Scenarios:
+- update:      call HyprDVDManager.update_windows directly on N windows
+- events:      run main()'s asyncio event loop and open N "DVD" windows via socket2
+- screensaver: run run_screensaver over N clients spread across the monitors
+
+Each run reports frames/sec, p50/p99 frame time, IPC requests/commands per
+frame and bytes exchanged, and the results are written as JSON.
+
+	python benchmarks/run.py --windows 1 10 100 1000 --output bench.json
+'''
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), 'src'))
+
+from fakehyprland import FakeHyprland  # noqa: E402
+
+SCENARIOS = ('update', 'events', 'screensaver', 'layout')
+
+
+def percentile(values, q):
+	'''Nearest-rank percentile of a list of numbers.'''
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+	return ordered[index]
+
+
+def timed_updates(manager, on_frame=None):
+	'''Wrap manager.update_windows to record the wall time of every frame.'''
+	frame_times = []
+	update = manager.update_windows
+
+	def update_windows(dt):
+		start = time.perf_counter()
+		update(dt)
+		frame_times.append(time.perf_counter() - start)
+		if on_frame:
+			on_frame(len(frame_times))
+
+	manager.update_windows = update_windows
+	return frame_times
+
+
+def report(scenario, windows, hypr, frame_times, wall_time, args):
+	stats = hypr.stats()
+	frames = len(frame_times) or 1
+	return {
+		'scenario': scenario,
+		'windows': windows,
+		'monitors': args.monitors,
+		'transport': args.transport,
+		'pipeline': args.pipeline,
+		'latency_ms': args.latency,
+		'frames': len(frame_times),
+		'wall_time_s': round(wall_time, 4),
+		'fps': round(len(frame_times) / wall_time, 2) if wall_time else 0.0,
+		'frame_ms_p50': round(percentile(frame_times, 50) * 1000, 4),
+		'frame_ms_p99': round(percentile(frame_times, 99) * 1000, 4),
+		'frame_ms_mean': round(statistics.fmean(frame_times) * 1000, 4) if frame_times else 0.0,
+		'ipc_requests_per_frame': round(stats['requests'] / frames, 3),
+		'ipc_commands_per_frame': round(stats['commands'] / frames, 3),
+		'bytes_sent_per_frame': round(stats['bytes_received'] / frames, 1),
+		'bytes_received_per_frame': round(stats['bytes_sent'] / frames, 1),
+		'commands': stats['by_command'],
+	}
+
+
+def populate(hypr, windows, size):
+	'''Spread N clients over the visible workspaces of the fake monitors.'''
+	addresses = []
+	for i in range(windows):
+		monitor = hypr.monitors[i % len(hypr.monitors)]
+		ws_id = monitor['activeWorkspace']['id']
+		slot = i // len(hypr.monitors)
+		cols = max(1, monitor['width'] // (size[0] + 2))
+		at = (monitor['x'] + (slot % cols) * (size[0] + 2), monitor['y'] + (slot // cols) * (size[1] + 2))
+		addresses.append(hypr.add_client(ws_id, size=size, at=at))
+	return addresses
+
+
+def bench_update(hypr, windows, args):
+	from hyprdvd.hyprDVDManager import HyprDVDManager
+	from hyprdvd.hyprDVD import HyprDVD
+
+	populate(hypr, windows, args.size)
+	manager = HyprDVDManager(size=args.size, pipelined=args.pipeline)
+	for client in manager.clients.refresh():
+		manager.track_window(HyprDVD.from_client(client, manager, size=args.size))
+
+	frame_times = timed_updates(manager)
+	hypr.reset_stats()
+	dt = 1 / args.fps
+	start = time.perf_counter()
+	for _ in range(args.frames):
+		manager.update_windows(dt)
+	manager.drain()
+	return frame_times, time.perf_counter() - start
+
+
+def bench_events(hypr, windows, args):
+	from hyprdvd.hyprDVDManager import HyprDVDManager
+	from hyprdvd.eventloop import run_events
+	from hyprdvd.clock import FrameClock
+
+	manager = HyprDVDManager(size=args.size, pipelined=args.pipeline)
+	clock = FrameClock(fps=args.fps, fps_cap=None)
+
+	async def drive():
+		task = asyncio.create_task(run_events(manager, clock=clock))
+		while not hypr.listeners():
+			await asyncio.sleep(0.001)
+		def open_windows():
+			for i in range(windows):
+				monitor = hypr.monitors[i % len(hypr.monitors)]
+				hypr.open_window(monitor['activeWorkspace']['id'], title='DVD', size=args.size)
+
+		# Emitting blocks once socket2's buffer is full, so it must not run on
+		# the loop that reads the events
+		await asyncio.get_running_loop().run_in_executor(None, open_windows)
+
+		# Wait for the burst of openwindow events to be handled
+		count, stable_since = -1, time.monotonic()
+		while time.monotonic() - stable_since < 0.25:
+			if len(manager.windows) != count:
+				count, stable_since = len(manager.windows), time.monotonic()
+			await asyncio.sleep(0.01)
+
+		done = asyncio.Event()
+		frame_times = timed_updates(manager, on_frame=lambda n: n >= args.frames and done.set())
+		hypr.reset_stats()
+		start = time.perf_counter()
+		await done.wait()
+		wall_time = time.perf_counter() - start
+		task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await task
+		return frame_times, wall_time
+
+	return asyncio.run(drive())
+
+
+def bench_screensaver(hypr, windows, args):
+	from hyprdvd.hyprDVDManager import HyprDVDManager
+	from hyprdvd.screensaver import run_screensaver
+
+	populate(hypr, windows, (400, 300))
+	hypr.move_cursor(10, 10)
+	manager = HyprDVDManager(size=args.size, pipelined=args.pipeline)
+
+	result = {}
+
+	def on_frame(n):
+		if n == 1:
+			hypr.reset_stats()
+			result['start'] = time.perf_counter()
+		if n >= args.frames:
+			result['end'] = time.perf_counter()
+			hypr.move_cursor(11, 11)
+
+	frame_times = timed_updates(manager, on_frame=on_frame)
+	run_screensaver(manager, size=args.size, exit_on='pointer', fps_cap=args.fps)
+	wall_time = result.get('end', time.perf_counter()) - result.get('start', time.perf_counter())
+	return frame_times[:args.frames], wall_time
+
+
+def bench_layout(hypr, windows, args):
+	'''Time the screensaver layout solver alone; no IPC is involved.'''
+	import random
+	from hyprdvd.layout import solve_layout
+
+	rng = random.Random(0)
+	monitor = hypr.monitors[0]
+	clients = [{'address': f'0x{i:x}', 'size': [rng.randint(200, 1600), rng.randint(150, 1000)]}
+		for i in range(windows)]
+	frame_times = []
+	hypr.reset_stats()
+	start = time.perf_counter()
+	for _ in range(args.frames):
+		solve_start = time.perf_counter()
+		solve_layout(clients, monitor['width'], monitor['height'], max_size=args.size)
+		frame_times.append(time.perf_counter() - solve_start)
+	return frame_times, time.perf_counter() - start
+
+
+RUNNERS = {
+	'update': bench_update,
+	'events': bench_events,
+	'screensaver': bench_screensaver,
+	'layout': bench_layout,
+}
+
+
+def run_one(scenario, windows, args):
+	hypr = FakeHyprland(monitors=args.monitors, refresh_rate=args.fps, latency=args.latency / 1000)
+	hypr.start()
+	old_env = dict(os.environ)
+	os.environ.update(hypr.environ())
+	try:
+		# Settings read the environment at import time, so import per instance
+		for name in [m for m in sys.modules if m == 'hyprdvd' or m.startswith('hyprdvd.')]:
+			del sys.modules[name]
+		if args.transport == 'subprocess':
+			os.environ['PATH'] = hypr.write_hyprctl_shim() + os.pathsep + os.environ.get('PATH', '')
+			from hyprdvd import utils
+			utils._ipc.path = os.path.join(hypr.runtime_dir, 'missing.sock')
+
+		with contextlib.redirect_stdout(io.StringIO()):
+			frame_times, wall_time = RUNNERS[scenario](hypr, windows, args)
+		return report(scenario, windows, hypr, frame_times, wall_time, args)
+	finally:
+		os.environ.clear()
+		os.environ.update(old_env)
+		hypr.stop()
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Benchmark hyprdvd against a fake Hyprland')
+	parser.add_argument('--scenario', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+	parser.add_argument('--windows', nargs='+', type=int, default=[1, 10, 100, 1000])
+	parser.add_argument('--monitors', type=int, default=3)
+	parser.add_argument('--frames', type=int, default=200)
+	parser.add_argument('--fps', type=float, default=1000.0,
+		help='frame rate to request; high values measure the unthrottled frame cost')
+	parser.add_argument('--size', default='40x30', help='window size in pixels (WIDTHxHEIGHT)')
+	parser.add_argument('--transport', choices=['socket', 'subprocess'], default='socket',
+		help='talk to the request socket directly or through a fake hyprctl binary')
+	parser.add_argument('--latency', type=float, default=0.0,
+		help='milliseconds the fake compositor takes to answer each request')
+	parser.add_argument('--pipeline', action='store_true',
+		help='send move batches on a background thread while the next frame is computed')
+	parser.add_argument('--output', help='write results to this JSON file')
+	args = parser.parse_args()
+
+	width, height = args.size.split('x')
+	args.size = (int(width), int(height))
+
+	results = []
+	for scenario in args.scenario:
+		for windows in args.windows:
+			result = run_one(scenario, windows, args)
+			results.append(result)
+			print(f"{scenario:12} {windows:5} windows  {result['fps']:9.1f} fps  "
+				f"p50 {result['frame_ms_p50']:8.3f} ms  p99 {result['frame_ms_p99']:8.3f} ms  "
+				f"{result['ipc_requests_per_frame']:6.2f} req/frame  "
+				f"{result['bytes_sent_per_frame'] + result['bytes_received_per_frame']:9.0f} B/frame")
+
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump({'argv': sys.argv[1:], 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+	main()
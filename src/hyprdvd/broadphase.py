@@ -0,0 +1,158 @@
+import math
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+
+class BruteForceBroadphase:
+	'''Reference broadphase: every window is a candidate for every other one.'''
+	def build(self, workspaces, x, y, width, height):
+		'''Return an index over the given window columns.'''
+		return _BruteForceIndex(len(workspaces))
+
+
+class GridBroadphase:
+	'''Per-workspace uniform grid broadphase.
+
+	Windows are bucketed by workspace, then into square cells as large as the
+	biggest window on that workspace. Rects are inflated by `margin` and half
+	a cell, since resolving one collision can push a window by up to half the
+	overlap; pairs brought together while a pass is being resolved are
+	therefore still reported.
+
+	The index is built from per-window columns (workspace ids, positions and
+	sizes as lists, see `PhysicsEngine.lists()`) rather than from window
+	objects, so building it reads no properties.
+	'''
+	def __init__(self, margin=1):
+		self.margin = margin
+
+	def build(self, workspaces, x, y, width, height):
+		'''Return an index over the given window columns.'''
+		return _GridIndex(workspaces, x, y, width, height, self.margin)
+
+
+class SweepBroadphase:
+	'''Per-workspace sort-and-sweep broadphase, vectorized with NumPy.
+
+	Rects are inflated exactly as in GridBroadphase and reported when their
+	inflated rects overlap, which the grid reports too. Windows are sorted by
+	the left edge of that rect, so each one's candidates on the x axis are a
+	contiguous run of the windows after it; the runs are expanded and checked
+	on the y axis with array operations rather than one window at a time.
+	'''
+	def __init__(self, margin=1):
+		self.margin = margin
+
+	def build(self, workspaces, x, y, width, height):
+		'''Return an index over the given window columns.'''
+		n = len(workspaces)
+		ids = {}
+		keys = np.array([ids.setdefault(ws, len(ids)) for ws in workspaces], dtype=np.int64)
+		x = np.asarray(x, dtype=np.float64)
+		y = np.asarray(y, dtype=np.float64)
+		width = np.asarray(width, dtype=np.float64)
+		height = np.asarray(height, dtype=np.float64)
+
+		cell_size = np.zeros(len(ids))
+		np.maximum.at(cell_size, keys, np.maximum(np.maximum(width, height), 1))
+		margin = self.margin + cell_size[keys] / 2
+		left, right = x - margin, x + width + margin
+		top, bottom = y - margin, y + height + margin
+
+		firsts, seconds = [], []
+		for key in range(len(ids)):
+			rows = np.flatnonzero(keys == key)
+			rows = rows[np.argsort(left[rows], kind='stable')]
+			lefts = left[rows]
+			# Windows p+1 .. end-1 start before window p ends
+			start = np.arange(1, len(rows) + 1)
+			counts = np.maximum(np.searchsorted(lefts, right[rows], side='right') - start, 0)
+			total = int(counts.sum())
+			if not total:
+				continue
+			p = np.repeat(np.arange(len(rows)), counts)
+			q = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + start[p]
+			a, b = rows[p], rows[q]
+			close = (top[b] <= bottom[a]) & (top[a] <= bottom[b])
+			a, b = a[close], b[close]
+			firsts.append(np.minimum(a, b))
+			seconds.append(np.maximum(a, b))
+
+		if not firsts:
+			return _PairIndex(n, np.zeros(0, dtype=np.int64), [])
+		first = np.concatenate(firsts)
+		second = np.concatenate(seconds)
+		order = np.lexsort((second, first))
+		return _PairIndex(n, first[order], second[order].tolist())
+
+
+class _BruteForceIndex:
+	def __init__(self, count):
+		self.count = count
+
+	def partners(self, i):
+		'''Indices j > i that may collide with window i.'''
+		return range(i + 1, self.count)
+
+	def query(self, workspace_id, x, y, width, height):
+		'''Indices of windows that may overlap the given rect.'''
+		return range(self.count)
+
+
+class _GridIndex:
+	def __init__(self, workspaces, x, y, width, height, margin):
+		self.margin = margin
+		self.cell_size = {}
+		for ws, w, h in zip(workspaces, width, height):
+			size = max(w, h, 1)
+			if size > self.cell_size.get(ws, 0):
+				self.cell_size[ws] = size
+
+		self.cells = {}
+		self.window_cells = []
+		for i, (ws, wx, wy, w, h) in enumerate(zip(workspaces, x, y, width, height)):
+			margin = self.margin + self.cell_size[ws] / 2
+			keys = self._cells(ws, wx - margin, wy - margin, w + 2 * margin, h + 2 * margin)
+			self.window_cells.append(keys)
+			for key in keys:
+				self.cells.setdefault(key, []).append(i)
+
+	def _cells(self, workspace_id, x, y, width, height):
+		size = self.cell_size.get(workspace_id)
+		if not size:
+			return []
+		x0 = math.floor(x / size)
+		y0 = math.floor(y / size)
+		x1 = math.floor((x + width) / size)
+		y1 = math.floor((y + height) / size)
+		return [(workspace_id, cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+	def partners(self, i):
+		'''Indices j > i that may collide with window i, in ascending order.'''
+		found = set()
+		for key in self.window_cells[i]:
+			for j in self.cells[key]:
+				if j > i:
+					found.add(j)
+		return sorted(found)
+
+	def query(self, workspace_id, x, y, width, height):
+		'''Indices of windows that may overlap the given rect, in ascending order.'''
+		found = set()
+		for key in self._cells(workspace_id, x, y, width, height):
+			found.update(self.cells.get(key, ()))
+		return sorted(found)
+
+
+class _PairIndex:
+	def __init__(self, count, first, second):
+		# Pairs (first[k], second[k]) sorted by first, then second
+		self.bounds = np.searchsorted(first, np.arange(count + 1)).tolist()
+		self.second = second
+
+	def partners(self, i):
+		'''Indices j > i that may collide with window i, in ascending order.'''
+		return self.second[self.bounds[i]:self.bounds[i + 1]]
@@ -0,0 +1,132 @@
+import json
+import time
+
+from . import metrics
+from .utils import hyprctl
+from .settings import RECONCILE_INTERVAL
+
+
+class ClientRegistry:
+	'''Address-indexed view of Hyprland clients kept current from socket2 events.
+
+	The registry is seeded with a single `clients -j` query and then updated
+	from events. Hyprland announces no event for size changes, so interactive
+	resizes only show up at the next re-seed: every `reconcile_interval`
+	seconds, or earlier after an event (or `mark_stale()`) that leaves the
+	cached geometry stale.
+	'''
+	# Events after which the cached geometry of a client can no longer be trusted
+	STALE_EVENTS = ('openwindow', 'changefloatingmode')
+	# Events handle_event reacts to
+	EVENTS = ('openwindow', 'closewindow', 'movewindow', 'movewindowv2', 'changefloatingmode')
+
+	def __init__(self, reconcile_interval=RECONCILE_INTERVAL):
+		self.clients = {}
+		self.reconcile_interval = reconcile_interval
+		self._last_sync = None
+		self._stale = True
+
+	def __contains__(self, address):
+		return address in self.clients
+
+	def __len__(self):
+		return len(self.clients)
+
+	def get(self, address):
+		'''Return the client dict for an address, or None.'''
+		return self.clients.get(address)
+
+	def values(self):
+		'''Return all known clients.'''
+		return list(self.clients.values())
+
+	def refresh(self, out=None):
+		'''Re-seed the registry from `clients -j` and return the client list.
+
+		`out` is a `clients -j` reply the caller already has, e.g. from a batch.
+		'''
+		start = time.perf_counter()
+		if out is None:
+			out = hyprctl(['clients', '-j']).stdout
+		parsed = time.perf_counter()
+		try:
+			clients = json.loads(out)
+		except (ValueError, TypeError):
+			return self.values()
+		if metrics.registry is not None:
+			metrics.registry.phase('ipc', parsed - start)
+			metrics.registry.phase('parse', time.perf_counter() - parsed)
+		self.clients = {c['address']: c for c in clients if c.get('address')}
+		self._last_sync = time.monotonic()
+		self._stale = False
+		return clients
+
+	def mark_stale(self):
+		'''Force a re-seed on the next reconciliation, e.g. after batch geometry changes.'''
+		self._stale = True
+
+	def maybe_reconcile(self, now=None):
+		'''Re-seed if the registry was never synced, is stale, or the interval elapsed.'''
+		if self._last_sync is None or self._stale:
+			self.refresh()
+			return True
+		if self.reconcile_interval:
+			now = time.monotonic() if now is None else now
+			if now - self._last_sync >= self.reconcile_interval:
+				self.refresh()
+				return True
+		return False
+
+	def subscribe(self, dispatcher):
+		'''Keep the registry current from an EventDispatcher.'''
+		dispatcher.subscribe(self.EVENTS, self.handle_event)
+
+	def handle_event(self, event_type, event_data):
+		'''Apply a socket2 event to the registry.'''
+		if not event_data or not event_data[0]:
+			return
+		address = f'0x{event_data[0]}'
+
+		if event_type == 'openwindow':
+			# openwindow>>ADDRESS,WORKSPACENAME,CLASS,TITLE
+			name = event_data[1] if len(event_data) > 1 else ''
+			self.clients[address] = {
+				'address': address,
+				'workspace': {'id': _workspace_id(name), 'name': name},
+				'class': event_data[2] if len(event_data) > 2 else '',
+				'title': ','.join(event_data[3:]),
+				'at': None,
+				'size': None,
+			}
+		elif event_type == 'closewindow':
+			self.clients.pop(address, None)
+		elif event_type == 'movewindowv2':
+			# movewindowv2>>ADDRESS,WORKSPACEID,WORKSPACENAME
+			client = self.clients.get(address)
+			if client and len(event_data) > 2:
+				try:
+					client['workspace'] = {'id': int(event_data[1]), 'name': event_data[2]}
+				except ValueError:
+					pass
+		elif event_type == 'movewindow':
+			# movewindow>>ADDRESS,WORKSPACENAME (superseded by movewindowv2 when ids are known)
+			client = self.clients.get(address)
+			if client and len(event_data) > 1:
+				ws_id = _workspace_id(event_data[1])
+				if ws_id is not None:
+					client['workspace'] = {'id': ws_id, 'name': event_data[1]}
+		elif event_type == 'changefloatingmode':
+			client = self.clients.get(address)
+			if client and len(event_data) > 1:
+				client['floating'] = event_data[1] == '1'
+
+		if event_type in self.STALE_EVENTS:
+			self._stale = True
+
+
+def _workspace_id(name):
+	'''Best-effort workspace id from a workspace name.'''
+	try:
+		return int(name)
+	except (TypeError, ValueError):
+		return None
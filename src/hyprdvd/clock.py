@@ -0,0 +1,73 @@
+import math
+import time
+
+from . import metrics
+from .settings import FPS_CAP, MAX_FRAME_TIME
+
+
+class FrameClock:
+	'''Fixed-timestep frame scheduler.
+
+	Frames are scheduled on a fixed grid of `1 / fps` seconds. `tick()` returns
+	the real time elapsed since the previous frame so motion can be expressed in
+	pixels per second. When a frame overruns its budget the missed deadlines are
+	skipped instead of being caught up back to back.
+	'''
+	def __init__(self, fps=None, fps_cap=FPS_CAP, max_frame_time=MAX_FRAME_TIME):
+		fps = fps or fps_cap
+		if fps_cap:
+			fps = min(fps, fps_cap)
+		self.fps = max(1.0, float(fps))
+		self.interval = 1.0 / self.fps
+		self.max_frame_time = max_frame_time
+		self.skipped = 0
+		self._last = None
+		self._next = None
+
+	@classmethod
+	def from_topology(cls, topology, fps_cap=FPS_CAP, **kwargs):
+		'''Create a clock running at the highest monitor refresh rate, up to `fps_cap`.'''
+		rates = topology.refresh_rates()
+		return cls(fps=max(rates) if rates else None, fps_cap=fps_cap, **kwargs)
+
+	def start(self, now=None):
+		'''(Re)start the clock; the first frame is due one interval from now.'''
+		now = time.monotonic() if now is None else now
+		self._last = now
+		self._next = now + self.interval
+
+	def delay(self, now=None):
+		'''Seconds to wait until the next frame is due.'''
+		if self._next is None:
+			self.start(now)
+		now = time.monotonic() if now is None else now
+		return max(0.0, self._next - now)
+
+	def tick(self, now=None):
+		'''Mark a frame as produced and return the elapsed time (dt) in seconds.'''
+		now = time.monotonic() if now is None else now
+		if self._last is None:
+			self.start(now)
+			return self.interval
+
+		dt = now - self._last
+		self._last = now
+
+		self._next += self.interval
+		if now >= self._next:
+			# Overran the frame budget: drop the missed frames rather than piling up
+			missed = math.floor((now - self._next) / self.interval) + 1
+			self._next += missed * self.interval
+			self.skipped += missed
+			if metrics.registry is not None:
+				metrics.registry.inc('hyprdvd_frames_overrun_total')
+				metrics.registry.inc('hyprdvd_frames_skipped_total', value=missed)
+
+		if self.max_frame_time:
+			dt = min(dt, self.max_frame_time)
+		return dt
+
+	def sleep(self):
+		'''Block until the next frame is due and return its dt.'''
+		time.sleep(self.delay())
+		return self.tick()
@@ -0,0 +1,166 @@
+import heapq
+
+# Impacts found this close in the past still count (float error after a response)
+EPSILON = 1e-9
+
+# Safety valve: more impacts than this in one frame means something degenerate
+# (e.g. a window wedged between two others); finish the frame discretely instead
+MAX_IMPACTS_PER_FRAME = 10000
+
+WALL_X, WALL_Y, PAIR_X, PAIR_Y = range(4)
+
+
+class ContinuousCollisions:
+	'''Event-driven collision handling for a HyprDVDManager.
+
+	Instead of stepping and then pushing overlapping windows apart, the exact
+	time of impact of every window with its screen borders and with every
+	other window on its workspace is computed and kept in a priority queue.
+	A frame advances all windows analytically to the next impact, applies it
+	(reflect at a border, exchange the velocity component along the impact
+	axis for two windows, like an elastic collision of equal masses), re-plans
+	the impacts of the windows involved and repeats until the frame's dt is
+	used up. Frames with no impact due only move windows.
+
+	The schedule is rebuilt after `invalidate()`, which the manager calls when
+	windows are added or removed or their geometry changes from outside. A
+	rebuild first runs the discrete pass once, so windows start out inside
+	their screens and apart from each other.
+	'''
+	def __init__(self, manager):
+		self.manager = manager
+		self.now = 0.0
+		self.impacts = 0
+		self._queue = None
+		self._versions = []
+		self._seq = 0
+		self._by_workspace = {}
+
+	def invalidate(self):
+		'''Drop the schedule; it is rebuilt on the next advance.'''
+		self._queue = None
+
+	def advance(self, dt):
+		'''Move every window forward by dt seconds, handling all impacts on the way.'''
+		engine = self.manager.physics
+		if self._queue is None:
+			self._rebuild()
+		end = self.now + dt
+		queue = self._queue
+		handled = 0
+		while queue and queue[0][0] <= end:
+			when, _, kind, i, j, version_i, version_j = heapq.heappop(queue)
+			if self._versions[i] != version_i or (j >= 0 and self._versions[j] != version_j):
+				continue
+			if when > self.now:
+				engine.step(when - self.now)
+				self.now = when
+			self._apply(kind, i, j)
+			handled += 1
+			if handled > MAX_IMPACTS_PER_FRAME:
+				engine.step(end - self.now)
+				self.now = end
+				self.manager.check_collisions()
+				self.invalidate()
+				return
+		if end > self.now:
+			engine.step(end - self.now)
+		self.now = end
+		self.impacts += handled
+
+	def _rebuild(self):
+		manager = self.manager
+		manager.check_collisions()
+		self._queue = []
+		self._versions = [0] * len(manager.windows)
+		self._by_workspace = {}
+		for i, window in enumerate(manager.windows):
+			self._by_workspace.setdefault(window.workspace_id, []).append(i)
+		for rows in self._by_workspace.values():
+			for a, i in enumerate(rows):
+				self._schedule_walls(i)
+				for j in rows[a + 1:]:
+					self._schedule_pair(i, j)
+
+	def _replan(self, rows):
+		for i in rows:
+			self._versions[i] += 1
+		for i in rows:
+			self._schedule_walls(i)
+			for j in self._by_workspace.get(self.manager.windows[i].workspace_id, ()):
+				if j != i and not (j in rows and j < i):
+					self._schedule_pair(i, j)
+
+	def _push(self, when, kind, i, j):
+		self._seq += 1
+		heapq.heappush(self._queue, (when, self._seq, kind, i, j,
+			self._versions[i], self._versions[j] if j >= 0 else 0))
+
+	def _schedule_walls(self, i):
+		e = self.manager.physics
+		for kind, pos, vel, limit in (
+			(WALL_X, e.x[i], e.vx[i], e.screen_width[i] - e.width[i]),
+			(WALL_Y, e.y[i], e.vy[i], e.screen_height[i] - e.height[i]),
+		):
+			if limit <= 0:
+				# As large as the screen on this axis: the discrete pass pins it
+				continue
+			if vel > 0:
+				t = (limit - pos) / vel
+			elif vel < 0:
+				t = -pos / vel
+			else:
+				continue
+			self._push(self.now + max(0.0, t), kind, i, -1)
+
+	def _schedule_pair(self, i, j):
+		'''Queue the time window j's rect starts overlapping window i's, if it ever does.'''
+		e = self.manager.physics
+		entry_x, exit_x = _axis_interval(e.x[j] - e.x[i], e.vx[j] - e.vx[i], e.width[i], e.width[j])
+		entry_y, exit_y = _axis_interval(e.y[j] - e.y[i], e.vy[j] - e.vy[i], e.height[i], e.height[j])
+		entry = max(entry_x, entry_y)
+		if entry >= min(exit_x, exit_y) or entry < -EPSILON or entry == float('inf'):
+			# Never touching, or already overlapping (nothing continuous can do about that)
+			return
+		kind = PAIR_X if entry_x >= entry_y else PAIR_Y
+		self._push(self.now + max(0.0, entry), kind, i, j)
+
+	def _apply(self, kind, i, j):
+		e = self.manager.physics
+		if kind == WALL_X:
+			limit = e.screen_width[i] - e.width[i]
+			if e.vx[i] > 0:
+				e.x[i] = limit
+			else:
+				e.x[i] = 0
+			e.vx[i] = -e.vx[i]
+			self._replan((i,))
+		elif kind == WALL_Y:
+			limit = e.screen_height[i] - e.height[i]
+			if e.vy[i] > 0:
+				e.y[i] = limit
+			else:
+				e.y[i] = 0
+			e.vy[i] = -e.vy[i]
+			self._replan((i,))
+		elif kind == PAIR_X:
+			e.vx[i], e.vx[j] = e.vx[j], e.vx[i]
+			self._replan((i, j))
+		else:
+			e.vy[i], e.vy[j] = e.vy[j], e.vy[i]
+			self._replan((i, j))
+
+
+def _axis_interval(offset, velocity, size_i, size_j):
+	'''Times during which two 1D segments overlap.
+
+	`offset` and `velocity` are those of segment j relative to segment i; the
+	segments overlap while -size_j < offset + velocity * t < size_i.
+	'''
+	if velocity == 0:
+		if -size_j < offset < size_i:
+			return float('-inf'), float('inf')
+		return float('inf'), float('-inf')
+	t1 = (-size_j - offset) / velocity
+	t2 = (size_i - offset) / velocity
+	return (t1, t2) if t1 < t2 else (t2, t1)
@@ -0,0 +1,25 @@
+from socket import socket, AF_UNIX, SOCK_STREAM
+
+from .settings import CONTROL_SOCKET_PATH
+
+# Client side of the daemon's control socket. `hyprdvd --stop`, `--status`
+# and a screensaver handed to a running daemon only need this module, so it
+# must not import the animation, asyncio or NumPy.
+
+
+def send_command(command, path=None, timeout=None):
+	'''Send one command to a running daemon and return its reply, or None if no daemon answers.'''
+	try:
+		with socket(AF_UNIX, SOCK_STREAM) as sock:
+			sock.settimeout(timeout)
+			sock.connect(path or CONTROL_SOCKET_PATH)
+			sock.sendall(command.encode() + b'\n')
+			chunks = []
+			while True:
+				chunk = sock.recv(4096)
+				if not chunk:
+					break
+				chunks.append(chunk)
+	except OSError:
+		return None
+	return b''.join(chunks).decode(errors='ignore').strip()
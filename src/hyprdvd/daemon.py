@@ -0,0 +1,204 @@
+import argparse
+import asyncio
+import os
+import shlex
+import signal
+import threading
+
+from .settings import CONTROL_SOCKET_PATH, FPS_CAP, POINTER_PROBE_RATE
+from .control import send_command
+from .clock import FrameClock
+from .eventloop import run_events
+from .events import EventDispatcher
+from .hyprDVDManager import HyprDVDManager
+from .screensaver import run_screensaver
+
+
+class _StartParser(argparse.ArgumentParser):
+	'''ArgumentParser that raises ValueError instead of exiting, so a bad control line cannot stop the daemon.'''
+	def error(self, message):
+		raise ValueError(message)
+
+
+def _start_parser():
+	'''Options accepted by the control socket's `start` command.'''
+	parser = _StartParser(prog='start', add_help=False, allow_abbrev=False)
+	parser.add_argument('--size', default=None)
+	parser.add_argument('--workspaces', default=None)
+	parser.add_argument('--exit-on', choices=['pointer', 'signal'], default='pointer')
+	parser.add_argument('--fps', type=float, default=None)
+	parser.add_argument('--pointer-rate', type=float, default=POINTER_PROBE_RATE)
+	parser.add_argument('--per-monitor', action='store_true')
+	parser.add_argument('--collisions', choices=['discrete', 'continuous'], default=None)
+	parser.add_argument('--seed', type=int, default=None)
+	parser.add_argument('--pipeline', action='store_true')
+	return parser
+
+
+def parse_size(value):
+	'''Parse WIDTHxHEIGHT into a (width, height) tuple; raises ValueError.'''
+	width, height = value.split('x')
+	return (int(width), int(height))
+
+
+class ScreensaverSession:
+	'''One screensaver run on a worker thread, stoppable from the daemon.'''
+	def __init__(self, manager, options, fps_cap):
+		self.manager = manager
+		self.options = options
+		self.stop = threading.Event()
+		self.thread = threading.Thread(target=self._run, args=(fps_cap,), name='hyprdvd-screensaver', daemon=True)
+
+	def _run(self, fps_cap):
+		try:
+			run_screensaver(
+				self.manager,
+				size=self.options.size,
+				workspaces=self.options.workspaces,
+				exit_on=self.options.exit_on,
+				fps_cap=fps_cap,
+				pointer_rate=self.options.pointer_rate,
+				per_monitor=self.options.per_monitor,
+				stop=self.stop
+			)
+		except Exception as e:
+			print(f'Screensaver failed: {e}')
+
+	@property
+	def running(self):
+		return self.thread.is_alive()
+
+
+class Daemon:
+	'''Resident hyprdvd process: DVD-title animation plus an on-demand screensaver.
+
+	The DVD manager listens on socket2 exactly like the default mode, which
+	keeps its client registry and monitor topology warm. Screensaver runs are
+	started and stopped through a control socket that takes one text command
+	per connection (`start [options]`, `stop`, `status`) and answers with one
+	line. Screensaver managers share the warm topology and client registry,
+	so a run only asks Hyprland for what no event reports: the cursor
+	position and current client geometry, in one batch.
+	'''
+	def __init__(self, size=None, fps_cap=FPS_CAP, path=None, seed=None, collisions='discrete', fast_forward=False, profile=None, pipelined=False):
+		self.path = path or CONTROL_SOCKET_PATH
+		self.fps_cap = fps_cap
+		self.manager = HyprDVDManager(size=size, seed=seed, collisions=collisions, fast_forward=fast_forward,
+			profile=profile, pipelined=pipelined)
+		self.session = None
+		self.dispatcher = EventDispatcher()
+		self._events = None
+
+	def run(self):
+		'''Serve until SIGTERM, socket2 closing, or SIGINT while idle.'''
+		asyncio.run(self.serve())
+
+	async def serve(self):
+		if send_command('status', self.path, timeout=1.0) is not None:
+			print(f'hyprdvd daemon already running on {self.path}')
+			return
+		if os.path.exists(self.path):
+			os.unlink(self.path)
+
+		server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+		os.chmod(self.path, 0o600)
+		loop = asyncio.get_running_loop()
+		loop.add_signal_handler(signal.SIGINT, self._interrupt)
+		loop.add_signal_handler(signal.SIGTERM, self._shutdown)
+		print(f'hyprdvd daemon listening on {self.path}')
+
+		clock = FrameClock.from_topology(self.manager.topology, fps_cap=self.fps_cap)
+		self._events = asyncio.create_task(run_events(self.manager, clock=clock, dispatcher=self.dispatcher))
+		try:
+			await self._events
+		except asyncio.CancelledError:
+			pass
+		finally:
+			server.close()
+			await self._stop_session()
+			self.manager.profile.restore()
+			try:
+				os.unlink(self.path)
+			except OSError:
+				pass
+
+	def _interrupt(self):
+		# SIGINT stops a running screensaver (e.g. `pkill -INT hyprdvd` from an
+		# idle daemon); with nothing running it stops the daemon itself.
+		if self.session is not None and self.session.running:
+			self.session.stop.set()
+		else:
+			self._shutdown()
+
+	def _shutdown(self):
+		if self._events is not None:
+			self._events.cancel()
+
+	def window_counts(self):
+		'''Animated windows per workspace: DVD windows plus those of a running screensaver.'''
+		counts = self.manager.window_counts()
+		session = self.session
+		if session is not None and session.running:
+			counts.update(session.manager.window_counts())
+		return counts
+
+	async def _stop_session(self):
+		session = self.session
+		if session is None:
+			return False
+		session.stop.set()
+		await asyncio.get_running_loop().run_in_executor(None, session.thread.join)
+		self._end_session()
+		return True
+
+	def _end_session(self):
+		self.session = None
+
+	async def _handle_client(self, reader, writer):
+		try:
+			request = await asyncio.wait_for(reader.readline(), timeout=1.0)
+			reply = await self.command(request.decode(errors='ignore'))
+		except (Exception, SystemExit) as e:
+			reply = f'error {e}'
+		writer.write(reply.encode() + b'\n')
+		try:
+			await writer.drain()
+		finally:
+			writer.close()
+
+	async def command(self, request):
+		'''Execute one control command and return the reply line.'''
+		args = shlex.split(request)
+		if not args:
+			return 'error empty command'
+		name, args = args[0], args[1:]
+
+		if name == 'start':
+			if self.session is not None and self.session.running:
+				return 'error screensaver already running'
+			self._end_session()
+			try:
+				options = _start_parser().parse_args(args)
+				if options.size:
+					options.size = parse_size(options.size)
+			except ValueError as e:
+				return f'error {e}'
+			manager = HyprDVDManager(size=options.size, seed=options.seed, topology=self.manager.topology,
+				collisions=options.collisions or self.manager.collisions, profile=self.manager.profile,
+				pipelined=options.pipeline or self.manager.pipeline is not None, clients=self.manager.clients)
+			fps_cap = min(options.fps, self.fps_cap) if options.fps else self.fps_cap
+			self.session = ScreensaverSession(manager, options, fps_cap)
+			self.session.thread.start()
+			return 'ok started'
+
+		if name == 'stop':
+			return 'ok stopped' if await self._stop_session() else 'ok not running'
+
+		if name == 'status':
+			if self.session is not None and self.session.running:
+				state = f'screensaver running with {sum(self.session.manager.window_counts().values())} windows'
+			else:
+				state = 'screensaver idle'
+			return f'ok {state}, {len(self.manager.windows)} DVD windows'
+
+		return f'error unknown command {name}'
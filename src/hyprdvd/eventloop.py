@@ -0,0 +1,59 @@
+import asyncio
+
+from .settings import SOCKET_PATH
+from .clock import FrameClock
+from .events import EventDispatcher
+
+
+async def animate(manager, wake, clock, dispatcher):
+	'''Run animation frames while the manager has windows, then sleep until woken.
+
+	Each frame first runs the dispatcher's coalesced handlers, so events
+	that arrived since the last frame are handled once, on their latest state.
+	'''
+	while True:
+		await wake.wait()
+		clock.start()
+		while manager.windows:
+			await asyncio.sleep(clock.delay())
+			dispatcher.flush()
+			manager.update_windows(clock.tick())
+		dispatcher.flush()
+		# The flush may have resumed parked windows; keep going if so
+		if not manager.windows:
+			wake.clear()
+
+
+async def run_events(manager, clock=None, path=None, dispatcher=None):
+	'''Listen to Hyprland's event socket and animate DVD windows.
+
+	Events are awaited on a stream reader, so the process stays idle until
+	Hyprland has something to say. Each chunk read is handed to `dispatcher`
+	(an EventDispatcher the manager subscribes to; other consumers may add
+	their own handlers). The animation runs as a separate task that only
+	ticks while the manager has windows to move, paced by `clock`.
+
+	While animating, coalesced handlers (focus, workspace and monitor
+	changes) run once per frame; while idle, once per chunk read.
+	'''
+	clock = clock or FrameClock()
+	dispatcher = dispatcher or EventDispatcher()
+	manager.subscribe(dispatcher)
+	reader, writer = await asyncio.open_unix_connection(path or SOCKET_PATH)
+	wake = asyncio.Event()
+	animator = asyncio.create_task(animate(manager, wake, clock, dispatcher))
+	try:
+		while True:
+			chunk = await reader.read(1 << 16)
+			if not chunk:
+				print('Hyprland socket closed — exiting')
+				break
+			dispatcher.feed(chunk)
+			if not manager.windows:
+				# Idle: run coalesced handlers now, they may resume parked windows
+				dispatcher.flush()
+			if manager.windows:
+				wake.set()
+	finally:
+		animator.cancel()
+		writer.close()
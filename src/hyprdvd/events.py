@@ -0,0 +1,153 @@
+from collections import defaultdict
+
+import time
+
+from . import metrics, tracing
+from .settings import MAX_PENDING_EVENTS
+
+
+class EventParser:
+	'''Incremental parser for socket2's `EVENT>>DATA\\n` stream.
+
+	Chunks are appended to one bytearray and complete lines are located with
+	`find`, so a burst of events is scanned once instead of re-copying the
+	rest of the buffer for every line; consumed bytes are dropped once per
+	chunk. The event name is compared as bytes against `wanted` (a set the
+	caller may keep mutating) and only wanted lines get their payload decoded.
+	'''
+	def __init__(self, wanted=None):
+		self.wanted = wanted
+		self._buffer = bytearray()
+
+	def feed(self, data):
+		'''Add a chunk and return the complete wanted events as (event_type, event_data).'''
+		buffer = self._buffer
+		buffer += data
+		events = []
+		start = 0
+		wanted = self.wanted
+		while True:
+			end = buffer.find(b'\n', start)
+			if end < 0:
+				break
+			sep = buffer.find(b'>>', start, end)
+			if sep >= 0:
+				name = bytes(buffer[start:sep])
+				if wanted is None or name in wanted:
+					payload = buffer[sep + 2:end].decode(errors='ignore').rstrip('\r')
+					events.append((name.decode(errors='ignore'), payload.split(',')))
+			start = end + 1
+		if start:
+			del buffer[:start]
+		return events
+
+
+class EventDispatcher:
+	'''Dispatch table from socket2 event names to handlers.
+
+	Handlers are called as `handler(event_type, event_data)` in the order they
+	subscribed. Event names nobody subscribed to are skipped by `parser`
+	before their payload is decoded.
+
+	Handlers subscribed with `coalesce` are not called right away: the event
+	is parked under a key and `flush()` (once per frame) calls the handler
+	with the last event of each key, so a burst of focus or workspace
+	changes costs one call. At most `max_pending` events wait; when more
+	keys arrive the oldest is dropped.
+	'''
+	def __init__(self, max_pending=MAX_PENDING_EVENTS):
+		self.handlers = defaultdict(list)
+		self.parser = EventParser(wanted=set())
+		self.max_pending = max_pending
+		# (event_type, handler) -> key function of coalesced handlers
+		self._coalesce = {}
+		# (handler, key) -> latest (event_type, event_data), oldest first
+		self.pending = {}
+
+	def subscribe(self, event_types, handler, coalesce=False):
+		'''Call `handler` for every event in `event_types` (a name or an iterable of names).
+
+		With `coalesce=True` the handler runs at the next `flush()` with the
+		last event of each type; `coalesce` may also be a function
+		`key(event_type, event_data)` that decides which events replace each
+		other.
+		'''
+		if isinstance(event_types, str):
+			event_types = (event_types,)
+		if coalesce is True:
+			coalesce = _by_event_type
+		for event_type in event_types:
+			self.handlers[event_type].append(handler)
+			self.parser.wanted.add(event_type.encode())
+			if coalesce:
+				self._coalesce[(event_type, handler)] = coalesce
+
+	def unsubscribe(self, event_types, handler):
+		'''Remove a handler added with `subscribe`.'''
+		if isinstance(event_types, str):
+			event_types = (event_types,)
+		for event_type in event_types:
+			handlers = self.handlers.get(event_type, [])
+			if handler in handlers:
+				handlers.remove(handler)
+			self._coalesce.pop((event_type, handler), None)
+			for slot in [slot for slot, (pending_type, _) in self.pending.items()
+					if slot[0] == handler and pending_type == event_type]:
+				del self.pending[slot]
+			if not handlers:
+				self.handlers.pop(event_type, None)
+				self.parser.wanted.discard(event_type.encode())
+
+	def dispatch(self, event_type, event_data):
+		'''Call the handlers of one event.'''
+		if metrics.registry is not None:
+			metrics.registry.inc('hyprdvd_events_total', (('event', event_type),))
+		if tracing.recorder is not None:
+			start = time.perf_counter()
+		for handler in list(self.handlers.get(event_type, ())):
+			key = self._coalesce.get((event_type, handler))
+			if key is None:
+				handler(event_type, event_data)
+			else:
+				self._defer(handler, key(event_type, event_data), event_type, event_data)
+		if tracing.recorder is not None:
+			tracing.recorder.span(event_type, 'event', start, time.perf_counter(), {'data': ','.join(event_data)})
+
+	def _defer(self, handler, key, event_type, event_data):
+		slot = (handler, key)
+		pending = self.pending
+		if slot in pending:
+			# Last writer wins; re-inserting keeps the queue in arrival order
+			superseded = pending.pop(slot)[0]
+			if metrics.registry is not None:
+				metrics.registry.inc('hyprdvd_events_coalesced_total', (('event', superseded),))
+		elif len(pending) >= self.max_pending:
+			dropped = pending.pop(next(iter(pending)))[0]
+			if metrics.registry is not None:
+				metrics.registry.inc('hyprdvd_events_dropped_total', (('event', dropped),))
+		pending[slot] = (event_type, event_data)
+
+	def flush(self):
+		'''Run the coalesced handlers on the latest pending events; returns how many ran.'''
+		if not self.pending:
+			return 0
+		pending, self.pending = self.pending, {}
+		for (handler, _), (event_type, event_data) in pending.items():
+			if tracing.recorder is None:
+				handler(event_type, event_data)
+				continue
+			start = time.perf_counter()
+			handler(event_type, event_data)
+			tracing.recorder.span(event_type, 'coalesced', start, time.perf_counter(), {'data': ','.join(event_data)})
+		return len(pending)
+
+	def feed(self, data):
+		'''Parse a socket2 chunk and dispatch every complete event in it.'''
+		events = self.parser.feed(data)
+		for event_type, event_data in events:
+			self.dispatch(event_type, event_data)
+		return len(events)
+
+
+def _by_event_type(event_type, event_data):
+	return event_type
@@ -1,13 +1,43 @@
-import random
 import math
-import json
 
 from .utils import hyprctl
-from .settings import RESIZE
+from .settings import RESIZE, SPEED
+from .physics import PhysicsEngine
+
+
+def _engine_field(column):
+	'''Attribute stored in the window's row of its PhysicsEngine.'''
+	def fget(self):
+		return getattr(self._engine, column)[self._row]
+	def fset(self, value):
+		getattr(self._engine, column)[self._row] = value
+	return property(fget, fset)
+
 
 class HyprDVD:
-	'''Class for a single bouncing window.'''
-	def __init__(self, event_data, manager, size=None):
+	'''Class for a single bouncing window.
+
+	Position, velocity, size and screen bounds live in a PhysicsEngine row. A
+	new window gets a private engine until the manager attaches it to its own.
+	'''
+	__slots__ = (
+		'_engine', '_row', 'address', 'workspace_id', 'manager', 'requested_size',
+		'offset_x', 'offset_y', 'position_synced',
+	)
+
+	window_x = _engine_field('x')
+	window_y = _engine_field('y')
+	velocity_x = _engine_field('vx')
+	velocity_y = _engine_field('vy')
+	window_width = _engine_field('width')
+	window_height = _engine_field('height')
+	screen_width = _engine_field('screen_width')
+	screen_height = _engine_field('screen_height')
+
+	def __init__(self, event_data, manager, size=None, setup=True):
+		self._engine = PhysicsEngine(use_numpy=False)
+		self._row = self._engine.add(self)
+
 		self.address = f'0x{event_data[0]}'
 		self.workspace_id = int(event_data[1])
 		self.manager = manager
@@ -28,23 +58,24 @@ class HyprDVD:
 		self.window_y = 0
 		self.position_synced = False  # Track if we've synced with Hyprland
 
-		self.velocity_x = 2
-		self.velocity_y = 2
+		self.velocity_x = SPEED  # pixels per second
+		self.velocity_y = SPEED
 
-		self.set_window_start()
+		self.set_window_start(setup)
 
 	@classmethod
-	def from_client(cls, client, manager, size=None, at=None):
+	def from_client(cls, client, manager, size=None, at=None, setup=True):
 		'''Create a HyprDVD instance from a hyprctl client dict.
 
 		Optional args:
 		- size: tuple[int|float, int|float] -> forwarded to constructor (ratio or pixels)
 		- at: tuple[int, int] -> initial position to sync with (e.g., when caller already moved window)
+		- setup: bool -> make the window float and resize it; pass False when the caller batches that itself
 		'''
 		addr = client.get('address', '')
 		addr_stripped = addr.replace('0x', '') if addr.startswith('0x') else addr
 		ev = [addr_stripped, str(client['workspace']['id'])]
-		instance = cls(ev, manager, size=size)
+		instance = cls(ev, manager, size=size, setup=setup)
 		# If caller provides an explicit position (e.g., after moving the window), trust it.
 		if at is not None and len(at) == 2:
 			try:
@@ -91,28 +122,25 @@ class HyprDVD:
 		self.window_width = math.ceil(self.screen_width * resize)
 		self.window_height = math.ceil(self.screen_height * resize)
 
-	def set_window_start(self):
-		'''Set a random direction'''
-		if random.randrange(1, 100) % 2 == 0:
+	def set_window_start(self, setup=True):
+		'''Set a random direction, then make the window float at its animation size'''
+		rng = self.manager.rng
+		if rng.randrange(1, 100) % 2 == 0:
 			self.velocity_x *= -1
-		if random.randrange(101, 200) % 2 == 0:
+		if rng.randrange(101, 200) % 2 == 0:
 			self.velocity_y *= -1
 
+		if not setup:
+			return
 		hyprctl(['dispatch', 'setfloating', f'address:{self.address}'])
 		hyprctl(['dispatch', 'resizewindowpixel', 'exact',
-				 str(self.window_width), str(self.window_height), f',address:{self.address}'])
+				 str(int(self.window_width)), str(int(self.window_height)), f',address:{self.address}'])
 
 	def get_screen_size(self):
-		'''Get the screen size'''
-		monitors_json = json.loads(hyprctl(['monitors', '-j']).stdout)
-		for monitor in monitors_json:
-			if monitor['activeWorkspace']['id'] == int(self.workspace_id):
-				transform = monitor['transform'] in [1, 3, 5, 7]
-				self.screen_width = int(monitor['width'] / monitor['scale']) if not transform else int(monitor['height'] / monitor['scale'])
-				self.screen_height = int(monitor['height'] / monitor['scale']) if not transform else int(monitor['width'] / monitor['scale'])
-				self.offset_x = int(monitor.get('x', 0))
-				self.offset_y = int(monitor.get('y', 0))
-				break
+		'''Get the screen size from the manager's monitor topology'''
+		geometry = self.manager.topology.workspace_geometry(int(self.workspace_id))
+		if geometry:
+			self.screen_width, self.screen_height, self.offset_x, self.offset_y = geometry
 
 	def get_window_position_and_size(self, clients):
 		'''Get the window position and size'''
@@ -125,7 +153,7 @@ class HyprDVD:
 		self.window_width, self.window_height = window['size']
 		return True
 
-	def update(self):
-		'''Update window position'''
-		self.window_x += self.velocity_x
-		self.window_y += self.velocity_y
+	def update(self, dt):
+		'''Update window position by velocity * dt'''
+		self.window_x += self.velocity_x * dt
+		self.window_y += self.velocity_y * dt
@@ -1,209 +1,373 @@
-import json
 import random
+import time
+
+from . import metrics, tracing
 from .utils import hyprctl
 from .hyprDVD import HyprDVD
+from .clientRegistry import ClientRegistry
+from .broadphase import GridBroadphase, SweepBroadphase
+from .physics import PhysicsEngine
+from .topology import MonitorTopology
+from .placement import FreeSpace, PlacementEngine
+from .continuous import ContinuousCollisions
+from .windowStore import WindowStore
+from .options import PerformanceProfile
+from .pipeline import DispatchPipeline
 
 class HyprDVDManager:
 	'''Manages all HyprDVD windows.'''
 
-	def __init__(self, size=None):
-		self.windows = []
+	def __init__(self, size=None, broadphase=None, use_numpy=None, seed=None, topology=None, collisions='discrete', pause_hidden=True, fast_forward=False, profile=None, pipelined=False, clients=None):
+		self.windows = WindowStore()
+		# All randomness (start direction, placement) comes from here so runs can be seeded
+		self.rng = random.Random(seed)
+		self.placement = PlacementEngine(self.rng)
+		# ws_id -> FreeSpace of its windows, kept current as windows are added and
+		# dropped when they move, so a burst of new windows shares one build
+		self._free_space = {}
+		# Positions, velocities and sizes of self.windows, row i <-> windows[i]
+		self.physics = PhysicsEngine(use_numpy=use_numpy)
+		# Collision candidate search; BruteForceBroadphase restores the all-pairs scan
+		if broadphase is None:
+			broadphase = SweepBroadphase() if self.physics.use_numpy else GridBroadphase()
+		self.broadphase = broadphase
+		# 'discrete' (step, then push overlaps apart) or 'continuous' (exact times of impact)
+		self.collisions = collisions
+		self.continuous = ContinuousCollisions(self) if collisions == 'continuous' else None
 		self.window_size = size
+		# Workspaces with animating windows; the performance profile is held while any exist
 		self._disabled_workspaces = set()
-		self._animation_original_state = None
+		# Compositor options lowered while animating; may be shared with other managers
+		self.profile = profile or PerformanceProfile()
+		# Client cache; may be shared with other managers kept current by the same events
+		self.clients = ClientRegistry() if clients is None else clients
+		# Monitor layout cache; may be shared with other managers in the same process
+		self.topology = topology or MonitorTopology()
+		# address -> [command suffix, last dispatched x, last dispatched y]
+		self._dispatched = {}
+		# Per-monitor managers animating on their own threads (screensaver --per-monitor)
+		self.shards = []
+		# Windows on workspaces no monitor shows are parked out of `windows` and
+		# the physics engine; ws_id -> [(window, time parked)]
+		self.pause_hidden = pause_hidden
+		self.fast_forward = fast_forward
+		self.parked = {}
+		# With `pipelined`, move batches go out on an I/O thread while the next frame computes
+		self.pipeline = DispatchPipeline() if pipelined else None
+
+	def subscribe(self, dispatcher):
+		'''Register the manager, its client registry and topology on an EventDispatcher.
+
+		The registry and topology subscribe first so the manager's handlers see
+		state that already includes the event.
+		'''
+		self.clients.subscribe(dispatcher)
+		self.topology.subscribe(dispatcher)
+		# Focus, workspace and monitor changes only matter in their latest state,
+		# so bursts of them are coalesced and handled once per frame
+		dispatcher.subscribe(self.topology.EVENTS, lambda *_: self.update_visibility(), coalesce=lambda *_: None)
+		dispatcher.subscribe('openwindow', self.handle_open_window)
+		dispatcher.subscribe('closewindow', self.handle_close_window)
+		dispatcher.subscribe('workspace', lambda _, event_data: self.handle_workspace_change(event_data), coalesce=True)
+		dispatcher.subscribe('activewindow', lambda _, event_data: self.handle_active_window_change(event_data), coalesce=True)
+
+	def handle_open_window(self, event_type, event_data):
+		'''Start animating newly opened windows titled "DVD".'''
+		if len(event_data) > 3 and event_data[3] == 'DVD':
+			self.add_window(event_data)
+
+	def handle_close_window(self, event_type, event_data):
+		'''Forget a parked window closed while its workspace was hidden.
+
+		Animated windows are cleaned up by update_windows once the registry
+		drops them; parked ones are not looked at until their workspace is
+		shown, so they would keep counting and blocking placement until then.
+		'''
+		if not event_data or not event_data[0]:
+			return
+		address = f'0x{event_data[0]}'
+		for ws_id, parked in list(self.parked.items()):
+			kept = [(window, since) for window, since in parked if window.address != address]
+			if len(kept) == len(parked):
+				continue
+			self._dispatched.pop(address, None)
+			self._free_space.pop(ws_id, None)
+			if kept:
+				self.parked[ws_id] = kept
+			else:
+				del self.parked[ws_id]
+				if not self.windows.count(ws_id):
+					self.handle_animation(ws_id, False)
+			return
 
 	def add_window(self, event_data):
 		'''Add a new window to manage'''
 		window = HyprDVD(event_data, self, size=self.window_size)
 
-		attempts = 0
-		max_x_span = max(0, window.screen_width - window.window_width)
-		max_y_span = max(0, window.screen_height - window.window_height)
-
-		while attempts < 100:
-			random_x = random.randint(0, max_x_span) if max_x_span else 0
-			random_y = random.randint(0, max_y_span) if max_y_span else 0
-
-			overlapping = False
-			for other_window in self.windows:
-				if (window.workspace_id == other_window.workspace_id and
-						random_x < other_window.window_x + other_window.window_width and
-						random_x + window.window_width > other_window.window_x and
-						random_y < other_window.window_y + other_window.window_height and
-						random_y + window.window_height > other_window.window_y):
-					overlapping = True
-					break
-			if not overlapping:
-				# Set the window's internal position before appending
-				window.window_x = random_x
-				window.window_y = random_y
-				global_x = int(window.offset_x + random_x)
-				global_y = int(window.offset_y + random_y)
-				hyprctl(['dispatch', 'movewindowpixel', 'exact',
-							str(global_x), str(global_y), f',address:{window.address}'])
-				self.windows.append(window)
-				self.handle_animation(window.workspace_id, True)
-				return
+		space = self.free_space(window.workspace_id, window.screen_width, window.screen_height)
+		position = self.placement.place(window.window_width, window.window_height, space)
+
+		if position is None:
+			# The workspace has no free spot large enough, close the window
+			hyprctl(['dispatch', 'closewindow', f'address:{window.address}'])
+			return
 
-			attempts += 1
+		# Set the window's internal position before tracking it
+		window.window_x, window.window_y = position
+		window.position_synced = True
+		global_x = int(window.offset_x + window.window_x)
+		global_y = int(window.offset_y + window.window_y)
+		hyprctl(['dispatch', 'movewindowpixel', 'exact',
+					str(global_x), str(global_y), f',address:{window.address}'])
+		self._dispatched[window.address] = [f',address:{window.address}', global_x, global_y]
+		self.track_window(window)
+		self.handle_animation(window.workspace_id, True)
 
-		# If no space is found after 100 attempts, close the window
-		hyprctl(['dispatch', 'closewindow', f'address:{window.address}'])
+	def free_space(self, workspace_id, screen_width, screen_height):
+		'''The free area of a workspace, around its animated and parked windows.'''
+		space = self._free_space.get(workspace_id)
+		if space is None or (space.width, space.height) != (int(screen_width), int(screen_height)):
+			space = FreeSpace(screen_width, screen_height)
+			windows = self.windows.on_workspace(workspace_id) + [w for w, _ in self.parked.get(workspace_id, ())]
+			for w in windows:
+				space.occupy(w.window_x, w.window_y, w.window_width, w.window_height)
+			self._free_space[workspace_id] = space
+		return space
+
+	def track_window(self, window):
+		'''Start animating a window, moving its state into the shared physics engine.'''
+		self.windows.add(window)
+		self.physics.attach(window)
+		space = self._free_space.get(window.workspace_id)
+		if space is not None:
+			space.occupy(window.window_x, window.window_y, window.window_width, window.window_height)
+		if self.continuous is not None:
+			self.continuous.invalidate()
 
 	def cleanup_window(self, window):
 		'''Cleanup a window and restore animation if it's the last one on the workspace.'''
 		if window in self.windows:
 			self.windows.remove(window)
-			if not any(w.workspace_id == window.workspace_id for w in self.windows):
+			self.physics.detach(window)
+			self._dispatched.pop(window.address, None)
+			self.geometry_changed()
+			if not self.windows.count(window.workspace_id):
 				self.handle_animation(window.workspace_id, False)
 
+	def update_visibility(self, now=None):
+		'''Park windows on workspaces no monitor shows and resume the ones shown again.
+
+		Parked windows keep their state in a private engine and cost nothing per
+		frame. With `fast_forward` they are advanced in closed form by the time
+		they were hidden when they come back, as if they had kept bouncing.
+		'''
+		if not self.pause_hidden:
+			return
+		visible = set(self.topology.visible_workspaces())
+		if not visible:
+			# Unknown layout: keep animating everything rather than freeze it all
+			return
+		now = time.monotonic() if now is None else now
+
+		hidden = [w for ws_id in self.windows.workspaces() if ws_id not in visible
+			for w in self.windows.on_workspace(ws_id)]
+		for window in hidden:
+			self.windows.remove(window)
+			self.physics.detach(window)
+			self.parked.setdefault(window.workspace_id, []).append((window, now))
+		if hidden:
+			self.geometry_changed()
+
+		for ws_id in [ws_id for ws_id in self.parked if ws_id in visible]:
+			for window, since in self.parked.pop(ws_id):
+				if self.fast_forward:
+					window._engine.fast_forward(now - since)
+				self.track_window(window)
+
+	def geometry_changed(self):
+		'''Drop state that assumes windows stay where they are after they moved, resized or left.'''
+		self._free_space.clear()
+		if self.continuous is not None:
+			self.continuous.invalidate()
+
 	def check_collisions(self):
 		'''Check for collisions between windows and with screen borders.'''
-		for i, window in enumerate(self.windows):
-			# Screen border collision with position correction
-			# Left border
-			if window.window_x <= 0:
-				window.window_x = 0
-				if window.velocity_x < 0:
-					window.velocity_x *= -1
-			# Right border
-			elif window.window_x >= window.screen_width - window.window_width:
-				window.window_x = window.screen_width - window.window_width
-				if window.velocity_x > 0:
-					window.velocity_x *= -1
-			
-			# Top border
-			if window.window_y <= 0:
-				window.window_y = 0
-				if window.velocity_y < 0:
-					window.velocity_y *= -1
-			# Bottom border
-			elif window.window_y >= window.screen_height - window.window_height:
-				window.window_y = window.screen_height - window.window_height
-				if window.velocity_y > 0:
-					window.velocity_y *= -1
+		# Screen border collision with position correction, for all windows at once
+		self.physics.bounce()
 
+		# The pairwise pass runs on plain lists: reading NumPy scalars one
+		# window at a time costs more than the arithmetic done with them
+		x, y, vx, vy, width, height = self.physics.lists('x', 'y', 'vx', 'vy', 'width', 'height')
+		workspaces = [window.workspace_id for window in self.windows]
+		index = self.broadphase.build(workspaces, x, y, width, height)
+		moved = False
+		for i in range(len(workspaces)):
 			# Other window collision
-			for other_window in self.windows[i+1:]:
+			for j in index.partners(i):
 				if (
-					window.workspace_id == other_window.workspace_id and
-					window.window_x < other_window.window_x + other_window.window_width and
-					window.window_x + window.window_width > other_window.window_x and
-					window.window_y < other_window.window_y + other_window.window_height and
-					window.window_y + window.window_height > other_window.window_y
+					workspaces[i] == workspaces[j] and
+					x[i] < x[j] + width[j] and
+					x[i] + width[i] > x[j] and
+					y[i] < y[j] + height[j] and
+					y[i] + height[i] > y[j]
 				):
-					# Calculate overlap amounts
-					overlap_x = min(window.window_x + window.window_width, other_window.window_x + other_window.window_width) - max(window.window_x, other_window.window_x)
-					overlap_y = min(window.window_y + window.window_height, other_window.window_y + other_window.window_height) - max(window.window_y, other_window.window_y)
-
-					# Separate windows based on smaller overlap
-					if overlap_x < overlap_y:
-						# Horizontal collision - separate horizontally
-						if window.window_x < other_window.window_x:
-							# window is on the left
-							separation = overlap_x / 2
-							window.window_x -= separation
-							other_window.window_x += separation
-						else:
-							# window is on the right
-							separation = overlap_x / 2
-							window.window_x += separation
-							other_window.window_x -= separation
-						
-						# Swap horizontal velocities only if they're moving towards each other
-						if (window.velocity_x > 0 and other_window.velocity_x < 0) or \
-						   (window.velocity_x < 0 and other_window.velocity_x > 0):
-							window.velocity_x, other_window.velocity_x = other_window.velocity_x, window.velocity_x
-					else:
-						# Vertical collision - separate vertically
-						if window.window_y < other_window.window_y:
-							# window is above
-							separation = overlap_y / 2
-							window.window_y -= separation
-							other_window.window_y += separation
-						else:
-							# window is below
-							separation = overlap_y / 2
-							window.window_y += separation
-							other_window.window_y -= separation
-						
-						# Swap vertical velocities only if they're moving towards each other
-						if (window.velocity_y > 0 and other_window.velocity_y < 0) or \
-						   (window.velocity_y < 0 and other_window.velocity_y > 0):
-							window.velocity_y, other_window.velocity_y = other_window.velocity_y, window.velocity_y
-
-	def update_windows(self):
-		'''Update all window positions and move them.'''
-		clients = json.loads(hyprctl(['clients', '-j']).stdout)
-		
+					self.resolve_collision(i, j, x, y, vx, vy, width, height)
+					moved = True
+		if moved:
+			self.physics.store(x=x, y=y, vx=vx, vy=vy)
+
+	@staticmethod
+	def resolve_collision(i, j, x, y, vx, vy, width, height):
+		'''Push two overlapping windows apart and swap their velocities if they approach each other.
+
+		Windows are row indices into the column lists, which are updated in place.
+		'''
+		# Calculate overlap amounts
+		overlap_x = min(x[i] + width[i], x[j] + width[j]) - max(x[i], x[j])
+		overlap_y = min(y[i] + height[i], y[j] + height[j]) - max(y[i], y[j])
+
+		# Separate windows based on smaller overlap: horizontally or vertically
+		if overlap_x < overlap_y:
+			pos, vel, separation = x, vx, overlap_x / 2
+		else:
+			pos, vel, separation = y, vy, overlap_y / 2
+		if pos[i] < pos[j]:
+			# i is on the left (or above)
+			pos[i] -= separation
+			pos[j] += separation
+		else:
+			# i is on the right (or below)
+			pos[i] += separation
+			pos[j] -= separation
+
+		# Swap velocities only if they're moving towards each other
+		if (vel[i] > 0 and vel[j] < 0) or (vel[i] < 0 and vel[j] > 0):
+			vel[i], vel[j] = vel[j], vel[i]
+
+	def step_physics(self, dt):
+		'''Advance all windows by dt seconds and resolve collisions, without any IPC.'''
+		# Every window moves, so the free space has to be rebuilt for the next placement
+		self._free_space.clear()
+		if self.continuous is not None:
+			self.continuous.advance(dt)
+			return
+
+		# Update positions based on velocity
+		self.physics.step(dt)
+
+		# Check and correct collisions
+		self.check_collisions()
+
+	def update_windows(self, dt):
+		'''Update all window positions by dt seconds and move them.'''
+		m = metrics.registry
+		t = tracing.recorder
+		timed = m is not None or t is not None
+		if timed:
+			frame_start = time.perf_counter()
+		if m is not None:
+			m.begin_frame()
+
+		self.clients.maybe_reconcile()
+		self.update_visibility()
+
 		# Check which windows still exist
 		for window in self.windows[:]:
-			client = next((w for w in clients if w['address'] == window.address), None)
+			client = self.clients.get(window.address)
 			if not client:
 				self.cleanup_window(window)
 				continue
-			
+
 			# Update size from Hyprland (can change if user resizes)
-			window.window_width, window.window_height = client['size']
-			
+			size = client.get('size')
+			if size and (size[0] != window.window_width or size[1] != window.window_height):
+				window.window_width, window.window_height = size
+				self.geometry_changed()
+
 			# On first update, sync position with Hyprland to get actual position
 			# After that, we manage position ourselves to avoid position conflicts
-			if not window.position_synced:
+			if not window.position_synced and client.get('at'):
 				ax, ay = client['at']                  # absolute coords from Hyprland
 				ox = getattr(window, 'offset_x', 0)    # monitor origin
 				oy = getattr(window, 'offset_y', 0)
 				window.window_x = ax - ox              # store RELATIVE position
 				window.window_y = ay - oy
 				window.position_synced = True
+				self.geometry_changed()
 
-		
-		# Update positions based on velocity
-		for window in self.windows:
-			window.update()
+		if timed:
+			physics_start = time.perf_counter()
 
-		# Check and correct collisions
-		self.check_collisions()
+		self.step_physics(dt)
 
-		# Send corrected positions to Hyprland (convert to int)
-		batch_command = []
-		for window in self.windows:
-			x = int(round(window.window_x))
-			y = int(round(window.window_y))
-			gx = int(window.window_x + getattr(window, 'offset_x', 0))
-			gy = int(window.window_y + getattr(window, 'offset_y', 0))
-			batch_command.append(f'dispatch movewindowpixel exact {gx} {gy},address:{window.address}')
-		if batch_command:
-			hyprctl(['--batch', ';'.join(batch_command)])
-
-	def _current_animation_state(self):
-		'''Return the current Hyprland animations:enabled value (best-effort).'''
-		try:
-			out = hyprctl(['getoption', 'animations:enabled']).stdout.strip()
-			for line in out.splitlines():
-				if line.startswith('int:'):
-					return line.split(':', 1)[1].strip()
-			# fallback: last token
-			tokens = out.split()
-			return tokens[1] if len(tokens) > 1 else '1'
-		except Exception:
-			return '1'
+		if timed:
+			dispatch_start = time.perf_counter()
+		if m is not None:
+			m.phase('physics', dispatch_start - physics_start)
+		if t is not None:
+			t.span('sync', 'frame', frame_start, physics_start)
+			t.span('physics', 'frame', physics_start, dispatch_start)
+
+		# Send corrected positions to Hyprland (convert to int), but only for
+		# windows whose pixel position changed since the last dispatch
+		batch_command = {}
+		dispatched = self._dispatched
+		x, y = self.physics.lists('x', 'y')
+		for window, wx, wy in zip(self.windows, x, y):
+			gx = int(wx + window.offset_x)
+			gy = int(wy + window.offset_y)
+			last = dispatched.get(window.address)
+			if last is None:
+				last = dispatched[window.address] = [f',address:{window.address}', None, None]
+			elif last[1] == gx and last[2] == gy:
+				continue
+			last[1] = gx
+			last[2] = gy
+			batch_command[window.address] = f'dispatch movewindowpixel exact {gx} {gy}{last[0]}'
+		if self.pipeline is not None:
+			self.pipeline.submit(batch_command)
+		elif batch_command:
+			hyprctl(['--batch', ';'.join(batch_command.values())])
+
+		if timed:
+			frame_end = time.perf_counter()
+		if m is not None:
+			m.phase('dispatch', frame_end - dispatch_start)
+			m.end_frame(frame_end - frame_start)
+		if t is not None:
+			t.span('dispatch', 'frame', dispatch_start, frame_end, {'moves': len(batch_command)})
+			t.span('update_windows', 'frame', frame_start, frame_end, {'windows': len(self.windows)})
+
+	def drain(self, timeout=None):
+		'''Wait for moves still queued on the dispatch pipeline (and those of shards) to be sent.'''
+		if self.pipeline is not None:
+			self.pipeline.drain(timeout)
+		for shard in list(self.shards):
+			shard.drain(timeout)
+
+	def window_counts(self):
+		'''Number of managed windows per workspace, including those of shards.'''
+		counts = self.windows.counts()
+		for ws_id, parked in self.parked.items():
+			counts[ws_id] += len(parked)
+		for shard in list(self.shards):
+			counts.update(shard.window_counts())
+		return counts
 
 	def handle_animation(self, workspace_id, is_enabled):
-		'''Handle animations for the workspace.'''
+		'''Track workspaces with animating windows, holding the performance profile while any exist.'''
 		if is_enabled:
 			if workspace_id in self._disabled_workspaces:
 				return
 			self._disabled_workspaces.add(workspace_id)
-			if self._animation_original_state is None:
-				self._animation_original_state = self._current_animation_state()
-			hyprctl(['keyword', 'animations:enabled', 'no'])
+			if len(self._disabled_workspaces) == 1:
+				self.profile.acquire()
 		else:
 			if workspace_id not in self._disabled_workspaces:
 				return
 			self._disabled_workspaces.remove(workspace_id)
-			if not self._disabled_workspaces and self._animation_original_state is not None:
-				hyprctl(['keyword', 'animations:enabled', self._animation_original_state])
-				self._animation_original_state = None
+			if not self._disabled_workspaces:
+				self.profile.release()
 
 	def handle_workspace_change(self, event_data):
 		'''Handle workspace change events.'''
@@ -211,13 +375,13 @@ class HyprDVDManager:
 			workspace_id = int(event_data[0])
 		except (IndexError, ValueError):
 			return
-		if any(w.workspace_id == workspace_id for w in self.windows):
+		if self.windows.count(workspace_id):
 			self.handle_animation(workspace_id, True)
 		else:
 			self.handle_animation(workspace_id, False)
 
 		for w_id in list(self._disabled_workspaces):
-			if not any(w.workspace_id == w_id for w in self.windows):
+			if not self.windows.count(w_id):
 				self.handle_animation(w_id, False)
 
 	def handle_active_window_change(self, event_data):
@@ -225,9 +389,9 @@ class HyprDVDManager:
 		if len(event_data) < 2 or not event_data[1]:
 			return
 		window_address = f'0x{event_data[1]}'
-		clients = json.loads(hyprctl(['clients', '-j']).stdout)
-		active_window = next((w for w in clients if w['address'] == window_address), None)
+		# The registry is kept current by events; no need to re-query clients here
+		active_window = self.clients.get(window_address)
 		if active_window:
 			workspace_id = active_window['workspace']['id']
-			if not any(w.address == window_address for w in self.windows):
+			if window_address not in self.windows:
 				self.handle_animation(workspace_id, False)
@@ -0,0 +1,105 @@
+from .settings import RESIZE
+
+# Share of its row a window may take up; the rest is left free to bounce in
+LAYOUT_FILL = 0.9
+
+
+def _aspect(client, default):
+	'''Width / height of a client's current size, or `default` if it has none.'''
+	try:
+		width, height = client.get('size') or (0, 0)
+		if width > 0 and height > 0:
+			return width / height
+	except (TypeError, ValueError):
+		pass
+	return default
+
+
+def solve_layout(clients, width, height, max_size=None, fill=LAYOUT_FILL, resize=RESIZE):
+	'''Non-overlapping animation rects for the clients of one workspace.
+
+	Returns {address: (x, y, width, height)} in monitor-local pixels. Windows
+	keep the aspect ratio of their current size and are packed on shelves
+	(rows) of one common height: a bisection finds the tallest row height at
+	which the greedy shelf packing still fits the screen, each window is then
+	capped at `resize` of the screen (and `max_size`) with its aspect ratio
+	kept, and the spare room of each row and between rows is spread evenly
+	so every window has space to move.
+
+	Clients are ordered by address, so the same set of windows always gets
+	the same layout whatever order they are listed in. The cost is
+	O(N log height), with no pairwise overlap checks.
+	'''
+	width = max(1, int(width))
+	height = max(1, int(height))
+	screen_aspect = width / height
+	entries = sorted(
+		((client['address'], _aspect(client, screen_aspect)) for client in clients if client.get('address')),
+		key=lambda entry: entry[0],
+	)
+	if not entries:
+		return {}
+
+	cap_w = width * resize
+	cap_h = height * resize
+	if max_size:
+		cap_w = min(cap_w, max_size[0])
+		cap_h = min(cap_h, max_size[1])
+	cap_w = max(1.0, cap_w)
+	cap_h = max(1.0, cap_h)
+
+	def sizes(row_height):
+		'''Window sizes for a row height, capped with their aspect ratio kept.'''
+		out = []
+		for _, aspect in entries:
+			w, h = aspect * row_height, float(row_height)
+			scale = min(1.0, cap_w / w, cap_h / h)
+			out.append((max(1, int(w * scale)), max(1, int(h * scale))))
+		return out
+
+	def shelves(row_height, window_sizes):
+		'''Greedy shelf packing; returns the rows of entry indexes, or None if they do not fit.'''
+		rows = [[]]
+		used = 0.0
+		for index, (w, _) in enumerate(window_sizes):
+			slot = w / fill
+			if rows[-1] and used + slot > width:
+				rows.append([])
+				used = 0.0
+			rows[-1].append(index)
+			used += slot
+		if len(rows) * row_height / fill > height:
+			return None
+		return rows
+
+	# Tallest row height that still fits; shelves only grow with the row height
+	low, high = 1, max(1, int(cap_h))
+	while low < high:
+		mid = (low + high + 1) // 2
+		if shelves(mid, sizes(mid)) is not None:
+			low = mid
+		else:
+			high = mid - 1
+	row_height = low
+	window_sizes = sizes(row_height)
+	rows = shelves(row_height, window_sizes)
+	if rows is None:
+		# Too many windows to fit even at one pixel; put them all on one row
+		rows = [list(range(len(entries)))]
+
+	layout = {}
+	gap_y = max(0.0, (height - len(rows) * row_height) / (len(rows) + 1))
+	top = gap_y
+	for row in rows:
+		used = sum(window_sizes[index][0] for index in row)
+		gap_x = max(0.0, (width - used) / (len(row) + 1))
+		left = gap_x
+		for index in row:
+			w, h = window_sizes[index]
+			x = min(int(left), width - w) if w <= width else 0
+			y = int(top + (row_height - h) / 2)
+			y = min(y, height - h) if h <= height else 0
+			layout[entries[index][0]] = (max(0, x), max(0, y), w, h)
+			left += w + gap_x
+		top += row_height + gap_y
+	return layout
@@ -1,10 +1,13 @@
-from socket import socket, AF_UNIX, SOCK_STREAM
-import time
 import argparse
+import atexit
+import shlex
 
-from .settings import SOCKET_PATH, __version__
-from .screensaver import run_screensaver
-from .hyprDVDManager import HyprDVDManager
+from .settings import __version__, FPS_CAP, POINTER_PROBE_RATE
+from .control import send_command
+
+# The animation modules (asyncio, NumPy through the physics engine) are only
+# imported by the branches that run it, so --stop, --status and a screensaver
+# handed to a running daemon start without loading them
 
 def main():
 	'''Main function of the script.'''
@@ -18,6 +21,18 @@ def main():
 		action='store_true',
 		help='Run in screensaver mode: take current workspace windows and animate them until the cursor moves'
 	)
+	parser.add_argument('--daemon',
+		action='store_true',
+		help='Stay resident: animate DVD windows and start/stop the screensaver on request over a control socket'
+	)
+	parser.add_argument('--stop',
+		action='store_true',
+		help='Stop the screensaver running in the daemon'
+	)
+	parser.add_argument('--status',
+		action='store_true',
+		help='Print the state of the daemon'
+	)
 	parser.add_argument('--size',
 		action='store',
 		help='Set the size of the bouncing windows (WIDTHxHEIGHT)'
@@ -34,10 +49,95 @@ def main():
 		default='pointer'
 	)
 
+	parser.add_argument('--pointer-rate',
+		help=f'How many times per second the screensaver checks the cursor (default {POINTER_PROBE_RATE})',
+		type=float,
+		default=POINTER_PROBE_RATE
+	)
+
+	parser.add_argument('--per-monitor',
+		action='store_true',
+		help='Screensaver: animate each monitor on its own thread with its own frame rate'
+	)
+
+	parser.add_argument('--fps',
+		help=f'Maximum animation frame rate; defaults to the monitor refresh rate, up to {FPS_CAP}',
+		type=float,
+		default=FPS_CAP
+	)
+
+	parser.add_argument('--pipeline',
+		action='store_true',
+		help='Send each frame\'s moves on a background thread while the next frame is computed '
+			'(faster when IPC is slow; frames never wait on Hyprland)'
+	)
+
+	parser.add_argument('--metrics-socket',
+		metavar='PATH',
+		help='Expose runtime metrics in Prometheus text format on this Unix socket',
+		default=None
+	)
+
+	parser.add_argument('--trace',
+		metavar='FILE',
+		help='Record IPC calls, handled events and frame/screensaver phases, and write them '
+			'to FILE as Chrome trace JSON on exit (open in Perfetto or chrome://tracing)',
+		default=None
+	)
 
+	parser.add_argument('--collisions',
+		choices=['discrete', 'continuous'],
+		default=None,
+		help='discrete: step, then push overlapping windows apart (default); '
+			'continuous: compute exact times of impact, so fast windows never pass through each other'
+	)
+
+	parser.add_argument('--fast-forward',
+		action='store_true',
+		help='DVD windows on hidden workspaces are paused; with this they catch up on where they would be when shown again'
+	)
+
+	parser.add_argument('--profile',
+		metavar='OPTION=VALUE',
+		nargs='*',
+		default=None,
+		help='Compositor options to set while animating, restored afterwards '
+			'(default: animations, blur and shadows off); pass none to change nothing'
+	)
+
+	parser.add_argument('--seed',
+		help='Seed for start directions and placement, for reproducible runs',
+		type=int,
+		default=None
+	)
+
+	simulation = parser.add_argument_group('headless simulation')
+	simulation.add_argument('--simulate',
+		metavar='FRAMES',
+		help='Run FRAMES frames of physics on in-memory windows, without Hyprland, and record the trajectories',
+		type=int,
+		default=None
+	)
+	simulation.add_argument('--windows', type=int, default=10, help='Simulated windows (default 10)')
+	simulation.add_argument('--monitors', type=int, default=1, help='Simulated 1920x1080 monitors (default 1)')
+	simulation.add_argument('--output',
+		metavar='FILE',
+		help='Trajectory file written by --simulate (default hyprdvd-trajectory.bin)',
+		default='hyprdvd-trajectory.bin'
+	)
+	simulation.add_argument('--verify',
+		metavar='FILE',
+		help='Replay the simulation recorded in FILE and check the trajectories still match',
+		default=None
+	)
+	simulation.add_argument('--tolerance', type=float, default=0.0,
+		help='Largest position difference in pixels --verify accepts (default 0, bit-exact)')
 
 	parser.add_argument('-v', '--version', action='version', version=f'HyprDVD v{__version__}')
 	args = parser.parse_args()
+	# Only an explicit --collisions is forwarded to a running daemon
+	requested_collisions = args.collisions
+	args.collisions = args.collisions or 'discrete'
 
 	# Parse the size argument (format: WIDTHxHEIGHT)
 	size = None
@@ -49,54 +149,141 @@ def main():
 			print(f'Error: Invalid size format {args.size}. Use WIDTHxHEIGHT format (e.g., 100x100)')
 			return
 
-	manager = HyprDVDManager(size=size)
+	if args.verify:
+		from .simulate import verify_trajectory
+		first, worst = verify_trajectory(args.verify, tolerance=args.tolerance)
+		if first is None:
+			print(f'OK: trajectories match (largest difference {worst:g} px)')
+		else:
+			print(f'MISMATCH: diverges at frame {first} (largest difference {worst:g} px)')
+			raise SystemExit(1)
+		return
+
+	if args.simulate is not None:
+		from .simulate import Simulation, write_trajectory
+		sim = Simulation(windows=args.windows, monitors=args.monitors,
+			seed=args.seed or 0, fps=args.fps, size=size, collisions=args.collisions)
+		fps = write_trajectory(args.output, sim, args.simulate)
+		print(f'Simulated {args.simulate} frames of {len(sim.manager.windows)} windows '
+			f'at {fps:.0f} frames/s -> {args.output}')
+		return
+
+	profile_options = None
+	if args.profile is not None:
+		from .options import parse_profile
+		try:
+			profile_options = parse_profile(args.profile)
+		except ValueError as e:
+			print(f'Error: {e}')
+			return
+
+	if args.stop or args.status:
+		reply = send_command('stop' if args.stop else 'status')
+		print(reply if reply is not None else 'hyprdvd daemon is not running')
+		return
+
+	if args.trace:
+		from . import tracing
+		atexit.register(_write_trace, tracing.enable(), args.trace)
+
+	if args.screensaver and not args.daemon and not args.trace:
+		# Hand the run to a resident daemon when there is one: it starts within a frame
+		# (unless tracing, which records this process)
+		command = ['start', '--exit-on', args.exit_on, '--fps', str(args.fps), '--pointer-rate', str(args.pointer_rate)]
+		if args.size:
+			command += ['--size', args.size]
+		if args.workspaces:
+			command += ['--workspaces', args.workspaces]
+		if args.per_monitor:
+			command.append('--per-monitor')
+		if requested_collisions:
+			command += ['--collisions', requested_collisions]
+		if args.seed is not None:
+			command += ['--seed', str(args.seed)]
+		if args.pipeline:
+			command.append('--pipeline')
+		reply = send_command(shlex.join(command))
+		if reply is not None:
+			# These configure the daemon process itself, which is already running
+			ignored = [flag for flag, given in (
+				('--profile', args.profile is not None),
+				('--fast-forward', args.fast_forward),
+				('--metrics-socket', args.metrics_socket),
+			) if given]
+			if ignored:
+				print(f'Warning: {", ".join(ignored)} ignored; the running daemon keeps the settings it was started with')
+			print(reply)
+			return
+	elif not args.daemon and not args.screensaver and send_command('status', timeout=1.0) is not None:
+		print('hyprdvd daemon is already animating DVD windows')
+		return
+
+	import asyncio
+	from . import metrics
+	from .clock import FrameClock
+	from .daemon import Daemon
+	from .eventloop import run_events
+	from .hyprDVDManager import HyprDVDManager
+	from .options import PerformanceProfile
+	from .screensaver import run_screensaver
+
+	# Put back options a previous run changed and could not restore (e.g. it was killed)
+	profile = PerformanceProfile(options=profile_options)
+	if profile.recover():
+		print('Restored compositor options left changed by a previous run')
+
+	if args.daemon:
+		daemon = Daemon(size=size, fps_cap=args.fps, seed=args.seed, collisions=args.collisions,
+			fast_forward=args.fast_forward, profile=profile, pipelined=args.pipeline)
+		if args.metrics_socket:
+			metrics.serve(args.metrics_socket)
+			metrics.registry.add_collector(lambda: [
+				('hyprdvd_windows', (('workspace', ws_id),), count)
+				for ws_id, count in daemon.window_counts().items()
+			])
+		daemon.run()
+		return
+
+	manager = HyprDVDManager(size=size, seed=args.seed, collisions=args.collisions,
+		fast_forward=args.fast_forward, profile=profile, pipelined=args.pipeline)
+
+	if args.metrics_socket:
+		metrics.serve(args.metrics_socket)
+		metrics.registry.add_collector(lambda: [
+			('hyprdvd_windows', (('workspace', ws_id),), count)
+			for ws_id, count in manager.window_counts().items()
+		])
 
 	if args.screensaver:
 		run_screensaver(
 			manager,
 			size=size,
 			workspaces = args.workspaces,
-			exit_on=args.exit_on
+			exit_on=args.exit_on,
+			fps_cap=args.fps,
+			pointer_rate=args.pointer_rate,
+			per_monitor=args.per_monitor
 		)
 		return
 
+	clock = FrameClock.from_topology(manager.topology, fps_cap=args.fps)
+
 	# Default behaviour: Connect to Hyprland's socket and listen for events.
-	with socket(AF_UNIX, SOCK_STREAM) as sock:
-		sock.connect(SOCKET_PATH)
-		sock.setblocking(False)
-		buffer = ''
-
-		while True:
-			try:
-				chunk = sock.recv(4096)
-				if not chunk:
-					print('Hyprland socket closed — exiting')
-					break
-				buffer += chunk.decode(errors='ignore')
-			except BlockingIOError:
-				pass
-
-			while '\n' in buffer:
-				line, buffer = buffer.split('\n', 1)
-				line = line.strip()
-				if not line or '>>' not in line:
-					continue
-
-				event_type, payload = line.split('>>', 1)
-				event_data = payload.split(',')
-
-				if event_type == 'openwindow':
-					if len(event_data) > 3 and event_data[3] == 'DVD':
-						manager.add_window(event_data)
-				elif event_type == 'workspace':
-					manager.handle_workspace_change(event_data)
-				elif event_type == 'activewindow':
-					manager.handle_active_window_change(event_data)
-
-			if manager.windows:
-				manager.update_windows()
-
-			time.sleep(0.01) # Control the loop speed
+	try:
+		asyncio.run(run_events(manager, clock=clock))
+	except KeyboardInterrupt:
+		pass
+	finally:
+		profile.restore()
+
+
+def _write_trace(recorder, path):
+	try:
+		recorder.write(path)
+	except OSError as e:
+		print(f'Error: could not write trace to {path}: {e}')
+		return
+	print(f'Trace written to {path}')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+import atexit
+import bisect
+import os
+import threading
+from socket import socket, AF_UNIX, SOCK_STREAM
+
+# The active Metrics instance, or None when metrics are disabled. Hot paths
+# check this before doing any work, so disabled metrics cost one lookup.
+registry = None
+
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+DESCRIPTIONS = {
+	'hyprdvd_frame_seconds': ('histogram', 'Wall time of an animation frame.'),
+	'hyprdvd_frame_phase_seconds': ('histogram', 'Wall time spent per frame in each phase (ipc, parse, physics, dispatch).'),
+	'hyprdvd_frames_total': ('counter', 'Animation frames produced.'),
+	'hyprdvd_frames_skipped_total': ('counter', 'Frame deadlines dropped because a frame overran its budget.'),
+	'hyprdvd_frames_overrun_total': ('counter', 'Frames that took longer than their budget.'),
+	'hyprdvd_ipc_requests_total': ('counter', 'Requests sent to Hyprland, by command.'),
+	'hyprdvd_ipc_request_seconds': ('histogram', 'Round-trip time of requests sent to Hyprland, by command.'),
+	'hyprdvd_dispatch_merged_total': ('counter', 'Frames whose moves were merged into the next batch because the previous dispatch was still in flight.'),
+	'hyprdvd_events_total': ('counter', 'socket2 events handled, by event type.'),
+	'hyprdvd_events_coalesced_total': ('counter', 'Deferred events superseded by a newer one before the next frame, by event type.'),
+	'hyprdvd_events_dropped_total': ('counter', 'Deferred events dropped because the pending queue was full, by event type.'),
+	'hyprdvd_windows': ('gauge', 'Managed windows, by workspace.'),
+}
+
+FRAME_PHASES = ('ipc', 'parse', 'physics', 'dispatch')
+
+
+class Histogram:
+	'''Cumulative-bucket histogram in the Prometheus sense.'''
+	def __init__(self, buckets=BUCKETS):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)
+		self.sum = 0.0
+		self.count = 0
+
+	def observe(self, value):
+		self.counts[bisect.bisect_left(self.buckets, value)] += 1
+		self.sum += value
+		self.count += 1
+
+
+class Metrics:
+	'''Counters, gauges and histograms exposed in Prometheus text format.'''
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.counters = {}    # (name, labels) -> value
+		self.histograms = {}  # (name, labels) -> Histogram
+		self.collectors = []  # callables returning [(name, labels, value)] gauges
+		# Per-thread phase accumulator, so concurrent animation workers don't mix frames
+		self._local = threading.local()
+
+	def inc(self, name, labels=(), value=1):
+		'''Increment a counter.'''
+		key = (name, labels)
+		with self.lock:
+			self.counters[key] = self.counters.get(key, 0) + value
+
+	def observe(self, name, value, labels=()):
+		'''Record a histogram sample.'''
+		key = (name, labels)
+		with self.lock:
+			histogram = self.histograms.get(key)
+			if histogram is None:
+				histogram = self.histograms[key] = Histogram()
+			histogram.observe(value)
+
+	def add_collector(self, collector):
+		'''Register a callable that returns gauge samples when metrics are rendered.'''
+		self.collectors.append(collector)
+
+	def _phases(self):
+		phases = getattr(self._local, 'phases', None)
+		if phases is None:
+			phases = self._local.phases = dict.fromkeys(FRAME_PHASES, 0.0)
+		return phases
+
+	def begin_frame(self):
+		'''Reset the calling thread's per-frame phase accumulator.'''
+		phases = self._phases()
+		for phase in phases:
+			phases[phase] = 0.0
+
+	def phase(self, phase, seconds):
+		'''Add time spent in a frame phase.'''
+		phases = self._phases()
+		phases[phase] = phases.get(phase, 0.0) + seconds
+
+	def end_frame(self, seconds):
+		'''Record a finished frame and the time spent in each of its phases.'''
+		self.inc('hyprdvd_frames_total')
+		self.observe('hyprdvd_frame_seconds', seconds)
+		for phase, value in self._phases().items():
+			self.observe('hyprdvd_frame_phase_seconds', value, (('phase', phase),))
+
+	def ipc(self, cmd, seconds):
+		'''Record one hyprctl/IPC request.'''
+		labels = (('command', command_label(cmd)),)
+		self.inc('hyprdvd_ipc_requests_total', labels)
+		self.observe('hyprdvd_ipc_request_seconds', seconds, labels)
+
+	def render(self):
+		'''Render all metrics in Prometheus text exposition format.'''
+		samples = {}
+		with self.lock:
+			for (name, labels), value in self.counters.items():
+				samples.setdefault(name, []).append((labels, value))
+			histograms = {key: (list(h.counts), h.sum, h.count) for key, h in self.histograms.items()}
+		for collector in self.collectors:
+			try:
+				for name, labels, value in collector():
+					samples.setdefault(name, []).append((labels, value))
+			except Exception:
+				continue
+		for (name, labels), data in histograms.items():
+			samples.setdefault(name, []).append((labels, data))
+
+		lines = []
+		for name in sorted(samples):
+			kind, description = DESCRIPTIONS.get(name, ('untyped', ''))
+			lines.append(f'# HELP {name} {description}')
+			lines.append(f'# TYPE {name} {kind}')
+			for labels, value in samples[name]:
+				if kind != 'histogram':
+					lines.append(f'{name}{_labels(labels)} {_number(value)}')
+					continue
+				counts, total, count = value
+				cumulative = 0
+				for bound, bucket_count in zip(BUCKETS + (float('inf'),), counts):
+					cumulative += bucket_count
+					le = '+Inf' if bound == float('inf') else repr(bound)
+					lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+				lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+				lines.append(f'{name}_count{_labels(labels)} {count}')
+		return '\n'.join(lines) + '\n'
+
+
+def command_label(cmd):
+	'''Short, low-cardinality label for a hyprctl argument list.'''
+	args = [arg for arg in cmd if arg not in ('-j', '--json')]
+	if not args:
+		return ''
+	if args[0] == '--batch':
+		return 'batch'
+	if args[0] == 'dispatch' and len(args) > 1:
+		return f'dispatch {args[1]}'
+	return args[0]
+
+
+def _labels(labels):
+	if not labels:
+		return ''
+	inner = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels)
+	return '{' + inner + '}'
+
+
+def _number(value):
+	if isinstance(value, float) and value.is_integer():
+		return str(int(value))
+	return str(value)
+
+
+def enable():
+	'''Turn metrics collection on and return the active registry.'''
+	global registry
+	if registry is None:
+		registry = Metrics()
+	return registry
+
+
+def serve(path, metrics=None):
+	'''Expose metrics on a Unix socket, answering each connection with the current snapshot.
+
+	Plain connections (e.g. `socat - UNIX-CONNECT:PATH`) get the text directly;
+	HTTP requests (e.g. `curl --unix-socket PATH http://localhost/metrics`) get
+	it wrapped in an HTTP response.
+	'''
+	metrics = metrics or enable()
+	if os.path.exists(path):
+		os.unlink(path)
+	server = socket(AF_UNIX, SOCK_STREAM)
+	server.bind(path)
+	server.listen(8)
+	atexit.register(_cleanup, server, path)
+
+	def loop():
+		while True:
+			try:
+				conn, _ = server.accept()
+			except OSError:
+				return
+			with conn:
+				conn.settimeout(0.2)
+				try:
+					request = conn.recv(4096)
+				except OSError:
+					request = b''
+				body = metrics.render().encode()
+				if request.startswith((b'GET', b'HEAD')):
+					header = (
+						'HTTP/1.0 200 OK\r\n'
+						'Content-Type: text/plain; version=0.0.4\r\n'
+						f'Content-Length: {len(body)}\r\n\r\n'
+					).encode()
+					body = header + (body if request.startswith(b'GET') else b'')
+				try:
+					conn.sendall(body)
+				except OSError:
+					pass
+
+	threading.Thread(target=loop, name='hyprdvd-metrics', daemon=True).start()
+	return server
+
+
+def _cleanup(server, path):
+	server.close()
+	try:
+		os.unlink(path)
+	except OSError:
+		pass
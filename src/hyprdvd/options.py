@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+
+from .utils import hyprctl, hyprctl_batch
+from .settings import PERFORMANCE_PROFILE, OPTIONS_SNAPSHOT_PATH
+
+
+def option_value(reply):
+	'''The value of a `j/getoption` reply as a string `keyword` accepts, or None.'''
+	for key in ('int', 'float', 'str', 'custom', 'bool'):
+		if key in reply:
+			value = reply[key]
+			if isinstance(value, bool):
+				return '1' if value else '0'
+			return str(value).strip()
+	return None
+
+
+def parse_replies(out):
+	'''Parse the concatenated JSON replies of a batch into {option: value}.
+
+	Options Hyprland does not know answer with plain text instead of JSON;
+	they are skipped.
+	'''
+	decoder = json.JSONDecoder()
+	values = {}
+	pos = 0
+	while True:
+		pos = out.find('{', pos)
+		if pos < 0:
+			break
+		try:
+			reply, pos = decoder.raw_decode(out, pos)
+		except ValueError:
+			pos += 1
+			continue
+		if isinstance(reply, dict) and reply.get('option'):
+			value = option_value(reply)
+			if value is not None:
+				values[reply['option']] = value
+	return values
+
+
+class PerformanceProfile:
+	'''Compositor settings lowered while windows animate, restored afterwards.
+
+	The current values of the profile's options are read in one batched
+	`j/getoption` request and written to `path` before the profile is applied
+	in one batch of `keyword`s. Restoring sends the saved values back in one
+	batch and deletes the file, so a run that crashes leaves the snapshot
+	behind for `recover()` to restore on the next start.
+
+	Acquire/release are reference counted, so managers sharing a profile
+	(the daemon's DVD manager and its screensaver) apply it once and restore
+	it only when the last of them is done.
+	'''
+	def __init__(self, options=None, path=None):
+		self.options = dict(PERFORMANCE_PROFILE if options is None else options)
+		self.path = path or OPTIONS_SNAPSHOT_PATH
+		self.snapshot = None
+		# True while `path` holds a snapshot this instance wrote
+		self._saved = False
+		self._users = 0
+		self._lock = threading.Lock()
+
+	@property
+	def active(self):
+		return self._users > 0
+
+	def acquire(self):
+		'''Apply the profile if nobody holds it yet.'''
+		with self._lock:
+			self._users += 1
+			if self._users == 1:
+				self._apply()
+
+	def release(self):
+		'''Restore the snapshot when the last holder lets go.'''
+		with self._lock:
+			if self._users == 0:
+				return
+			self._users -= 1
+			if self._users == 0:
+				self._restore()
+
+	def restore(self):
+		'''Restore the snapshot now, whoever still holds the profile (on exit).'''
+		with self._lock:
+			if self._users:
+				self._users = 0
+				self._restore()
+
+	def query(self):
+		'''Current values of the profile's options, in one request.'''
+		if not self.options:
+			return {}
+		out = hyprctl(['--batch', ';'.join(f'j/getoption {option}' for option in self.options)]).stdout
+		return parse_replies(out)
+
+	def _apply(self):
+		try:
+			self.snapshot = self.query()
+		except Exception:
+			self.snapshot = {}
+		# Only touch options we could read, so they can all be put back
+		changes = {option: value for option, value in self.options.items()
+			if option in self.snapshot and self.snapshot[option] != value}
+		if not changes:
+			# Nothing to put back; in particular, a snapshot file another
+			# process wrote (for values it already lowered) is not ours
+			self.snapshot = {}
+			return
+		self.snapshot = {option: self.snapshot[option] for option in changes}
+		self._saved = self._save()
+		hyprctl_batch([f'keyword {option} {value}' for option, value in changes.items()])
+
+	def _restore(self):
+		snapshot, self.snapshot = self.snapshot, None
+		if snapshot and not restore_snapshot(snapshot):
+			# Leave the file for recover() to try again
+			return
+		if self._saved:
+			self._saved = False
+			_unlink(self.path)
+
+	def _save(self):
+		'''Write the snapshot atomically; True if the file was written.'''
+		tmp = f'{self.path}.tmp'
+		try:
+			with open(tmp, 'w') as f:
+				json.dump({'pid': os.getpid(), 'options': self.snapshot}, f)
+			os.replace(tmp, self.path)
+		except OSError:
+			return False
+		return True
+
+	def recover(self):
+		'''Restore a snapshot left behind by a run that did not exit cleanly.
+
+		Returns the options restored. A snapshot whose process is still
+		alive belongs to another running hyprdvd and is left alone.
+		'''
+		try:
+			with open(self.path) as f:
+				saved = json.load(f)
+		except (OSError, ValueError):
+			return {}
+		pid = saved.get('pid')
+		if pid and pid != os.getpid() and _alive(pid):
+			return {}
+		options = saved.get('options') or {}
+		if restore_snapshot(options):
+			_unlink(self.path)
+		return options
+
+
+def parse_profile(items):
+	'''Build a profile from `OPTION=VALUE` strings; raises ValueError on malformed ones.'''
+	options = {}
+	for item in items:
+		option, sep, value = item.partition('=')
+		if not sep or not option.strip() or not value.strip():
+			raise ValueError(f'Invalid profile entry {item!r}, use OPTION=VALUE')
+		options[option.strip()] = value.strip()
+	return options
+
+
+def restore_snapshot(snapshot):
+	'''Send saved option values back in a single batch; True on success.'''
+	return hyprctl_batch([f'keyword {option} {value}' for option, value in snapshot.items()])
+
+
+def _alive(pid):
+	try:
+		os.kill(pid, 0)
+	except ProcessLookupError:
+		return False
+	except OSError:
+		return True
+	return True
+
+
+def _unlink(path):
+	try:
+		os.unlink(path)
+	except OSError:
+		pass
@@ -0,0 +1,213 @@
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+
+class PhysicsEngine:
+	'''Struct-of-arrays storage and batch integration for bouncing windows.
+
+	Every window owns one row in the position, velocity, size and screen bound
+	columns; `HyprDVD` attributes are views onto that row. With NumPy installed
+	the columns are contiguous arrays and a frame is integrated and bounced with
+	a handful of vectorized operations. Without it the columns are plain lists
+	updated in a single loop.
+
+	Row `i` is always the manager's `windows[i]`. Removing a row moves the
+	last row into its place (as WindowStore does with its list), so removal
+	is O(1) and attach order is only kept until the first removal.
+	'''
+	FLOAT_COLUMNS = ('x', 'y', 'vx', 'vy')
+	INT_COLUMNS = ('width', 'height', 'screen_width', 'screen_height')
+	COLUMNS = FLOAT_COLUMNS + INT_COLUMNS
+
+	def __init__(self, use_numpy=None, capacity=16):
+		if use_numpy is None:
+			use_numpy = np is not None
+		self.use_numpy = bool(use_numpy) and np is not None
+		self.owners = []
+		if self.use_numpy:
+			self._capacity = max(1, capacity)
+			for name in self.FLOAT_COLUMNS:
+				setattr(self, name, np.zeros(self._capacity, dtype=np.float64))
+			for name in self.INT_COLUMNS:
+				setattr(self, name, np.zeros(self._capacity, dtype=np.int64))
+		else:
+			for name in self.COLUMNS:
+				setattr(self, name, [])
+
+	def __len__(self):
+		return len(self.owners)
+
+	def add(self, owner, values=None):
+		'''Append a row for `owner` and return its index.'''
+		if values is None:
+			values = (0,) * len(self.COLUMNS)
+		row = len(self.owners)
+		if self.use_numpy:
+			if row == self._capacity:
+				self._grow()
+			for name, value in zip(self.COLUMNS, values):
+				getattr(self, name)[row] = value
+		else:
+			for name, value in zip(self.COLUMNS, values):
+				getattr(self, name).append(value)
+		self.owners.append(owner)
+		return row
+
+	def _grow(self):
+		self._capacity *= 2
+		for name in self.COLUMNS:
+			old = getattr(self, name)
+			new = np.zeros(self._capacity, dtype=old.dtype)
+			new[:len(old)] = old
+			setattr(self, name, new)
+
+	def remove(self, row):
+		'''Delete a row by moving the last row into it.'''
+		last = len(self.owners) - 1
+		for name in self.COLUMNS:
+			column = getattr(self, name)
+			if row != last:
+				column[row] = column[last]
+			if not self.use_numpy:
+				column.pop()
+		moved = self.owners.pop()
+		if row != last:
+			self.owners[row] = moved
+			moved._row = row
+
+	def lists(self, *names):
+		'''The first len(self) values of columns as Python lists.
+
+		Without NumPy these are the columns themselves, so changes to them
+		are changes to the engine; with NumPy they are copies that `store()`
+		writes back. Loops that touch rows one at a time run on these, as
+		indexing NumPy scalars costs more than the loop itself.
+		'''
+		if not self.use_numpy:
+			return [getattr(self, name) for name in names]
+		n = len(self.owners)
+		return [getattr(self, name)[:n].tolist() for name in names]
+
+	def store(self, **columns):
+		'''Write lists returned by `lists()` back into their columns.'''
+		if not self.use_numpy:
+			return
+		n = len(self.owners)
+		for name, values in columns.items():
+			getattr(self, name)[:n] = values
+
+	def values(self, row):
+		'''Return the column values of a row as plain Python numbers.'''
+		values = []
+		for name in self.COLUMNS:
+			value = getattr(self, name)[row]
+			values.append(int(value) if name in self.INT_COLUMNS else float(value))
+		return values
+
+	def attach(self, owner):
+		'''Move `owner` from its current engine into this one.'''
+		values = owner._engine.values(owner._row)
+		owner._engine.remove(owner._row)
+		owner._row = self.add(owner, values)
+		owner._engine = self
+
+	def detach(self, owner):
+		'''Move `owner` out of this engine into a private one, keeping its state.'''
+		values = self.values(owner._row)
+		self.remove(owner._row)
+		engine = PhysicsEngine(use_numpy=False)
+		owner._row = engine.add(owner, values)
+		owner._engine = engine
+
+	def step(self, dt=1):
+		'''Advance every position by velocity * dt.'''
+		n = len(self.owners)
+		if self.use_numpy:
+			x, y = self.x[:n], self.y[:n]
+			x += self.vx[:n] * dt
+			y += self.vy[:n] * dt
+			return
+		x, y, vx, vy = self.x, self.y, self.vx, self.vy
+		for i in range(n):
+			x[i] += vx[i] * dt
+			y[i] += vy[i] * dt
+
+	def bounce(self):
+		'''Clamp every window to its screen and reflect velocities at the borders.'''
+		n = len(self.owners)
+		if self.use_numpy:
+			self._bounce_axis(self.x[:n], self.vx[:n], self.screen_width[:n] - self.width[:n])
+			self._bounce_axis(self.y[:n], self.vy[:n], self.screen_height[:n] - self.height[:n])
+			return
+
+		x, y, vx, vy = self.x, self.y, self.vx, self.vy
+		width, height = self.width, self.height
+		screen_width, screen_height = self.screen_width, self.screen_height
+		for i in range(n):
+			# Left border
+			if x[i] <= 0:
+				x[i] = 0
+				if vx[i] < 0:
+					vx[i] = -vx[i]
+			# Right border
+			elif x[i] >= screen_width[i] - width[i]:
+				x[i] = screen_width[i] - width[i]
+				if vx[i] > 0:
+					vx[i] = -vx[i]
+
+			# Top border
+			if y[i] <= 0:
+				y[i] = 0
+				if vy[i] < 0:
+					vy[i] = -vy[i]
+			# Bottom border
+			elif y[i] >= screen_height[i] - height[i]:
+				y[i] = screen_height[i] - height[i]
+				if vy[i] > 0:
+					vy[i] = -vy[i]
+
+	def fast_forward(self, dt):
+		'''Advance every row by dt seconds in closed form, bouncing off the screen borders.
+
+		Window-to-window collisions are not considered; the next regular frame
+		separates any windows this leaves overlapping.
+		'''
+		n = len(self.owners)
+		if self.use_numpy:
+			self._fold_axis(self.x[:n], self.vx[:n], self.screen_width[:n] - self.width[:n], dt)
+			self._fold_axis(self.y[:n], self.vy[:n], self.screen_height[:n] - self.height[:n], dt)
+			return
+		for pos, vel, screen, size in ((self.x, self.vx, self.screen_width, self.width),
+				(self.y, self.vy, self.screen_height, self.height)):
+			for i in range(n):
+				limit = screen[i] - size[i]
+				if limit <= 0:
+					continue
+				# Unfold the bounces: moving in a box of length L is moving freely
+				# on a circle of length 2L, whose second half is the box mirrored
+				p = (pos[i] + vel[i] * dt) % (2 * limit)
+				if p > limit:
+					pos[i] = 2 * limit - p
+					vel[i] = -vel[i]
+				else:
+					pos[i] = p
+
+	@staticmethod
+	def _fold_axis(pos, vel, limit, dt):
+		ok = limit > 0
+		span = np.where(ok, 2 * limit, 1)
+		p = np.mod(pos + vel * dt, span)
+		back = ok & (p > limit)
+		pos[ok] = np.where(back, 2 * limit - p, p)[ok]
+		vel[back] = -vel[back]
+
+	@staticmethod
+	def _bounce_axis(pos, vel, limit):
+		low = pos <= 0
+		high = ~low & (pos >= limit)
+		pos[low] = 0
+		pos[high] = limit[high]
+		vel[low] = np.abs(vel[low])
+		vel[high] = -np.abs(vel[high])
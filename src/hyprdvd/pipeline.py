@@ -0,0 +1,87 @@
+import threading
+
+from . import metrics
+from .utils import hyprctl
+
+
+class DispatchPipeline:
+	'''Sends a manager's per-frame move batches on a background I/O thread.
+
+	`submit()` hands over a frame's moves and returns at once, so the next
+	frame's physics runs while Hyprland handles the previous batch. At most
+	one batch is in flight. Moves submitted while it is still in flight (the
+	dispatch missed the next frame's deadline) wait in a single pending batch
+	keyed by window: a newer move for a window replaces the older one, which
+	is safe because `movewindowpixel exact` is absolute, and the merged batch
+	goes out as soon as the I/O thread is free. The frame loop never blocks
+	on IPC and the pending batch never holds more than one move per window.
+	'''
+	def __init__(self, send=None, name='hyprdvd-dispatch'):
+		self._send = send or (lambda commands: hyprctl(['--batch', ';'.join(commands)]))
+		self.name = name
+		self._cond = threading.Condition()
+		self._pending = {}  # key (window address) -> command
+		self._busy = False
+		self._closed = False
+		self._thread = None
+		self.sent = 0
+		self.merged = 0
+
+	def submit(self, commands):
+		'''Queue {key: command} for sending; replaces pending commands with the same key.'''
+		if not commands:
+			return
+		with self._cond:
+			if self._pending:
+				# The previous frame's moves have not gone out yet
+				self.merged += 1
+				if metrics.registry is not None:
+					metrics.registry.inc('hyprdvd_dispatch_merged_total')
+			self._pending.update(commands)
+			if self._thread is None:
+				self._closed = False
+				self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+				self._thread.start()
+			self._cond.notify()
+
+	@property
+	def idle(self):
+		'''True when nothing is pending or in flight.'''
+		with self._cond:
+			return not self._pending and not self._busy
+
+	def drain(self, timeout=None):
+		'''Wait until every submitted command has been sent; False on timeout.'''
+		with self._cond:
+			return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+	def close(self, timeout=None):
+		'''Send what is pending, then stop the I/O thread (a later submit starts a new one).'''
+		with self._cond:
+			thread = self._thread
+			if thread is None:
+				return
+			self._closed = True
+			self._cond.notify_all()
+		thread.join(timeout)
+		with self._cond:
+			if self._thread is thread:
+				self._thread = None
+
+	def _run(self):
+		while True:
+			with self._cond:
+				self._cond.wait_for(lambda: self._pending or self._closed)
+				if not self._pending:
+					return
+				batch, self._pending = self._pending, {}
+				self._busy = True
+			try:
+				self._send(list(batch.values()))
+			except Exception:
+				pass
+			finally:
+				with self._cond:
+					self._busy = False
+					self.sent += 1
+					self._cond.notify_all()
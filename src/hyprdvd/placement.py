@@ -0,0 +1,142 @@
+import math
+import random
+
+# Side of the square cells free rects are bucketed in, in pixels
+CELL_SIZE = 128
+
+
+class FreeSpace:
+	'''Maximal free rectangles of one workspace (the MaxRects representation).
+
+	The free area starts as the whole screen. Every occupied rect splits the
+	free rects it intersects into up to four maximal pieces, and pieces fully
+	contained in another free rect are pruned, so any free rect large enough
+	for a window is a valid, non-overlapping position for it.
+
+	Free rects are bucketed in a grid of CELL_SIZE cells, so `occupy` only
+	looks at the rects under the occupied area and checks each new piece
+	against the rects covering its corner instead of scanning every pair.
+	Occupying an area that is already occupied changes nothing.
+	'''
+	def __init__(self, width, height, cell_size=CELL_SIZE):
+		self.width = int(width)
+		self.height = int(height)
+		self.cell_size = cell_size
+		self._cols = max(1, -(-self.width // cell_size))
+		self._rows = max(1, -(-self.height // cell_size))
+		self._free = {}  # rect -> None, in insertion order
+		self._cells = {}  # (col, row) -> set of free rects covering the cell
+		if self.width > 0 and self.height > 0:
+			self._add((0, 0, self.width, self.height))
+
+	def __len__(self):
+		return len(self._free)
+
+	@property
+	def free(self):
+		'''The free rects as (x, y, width, height).'''
+		return list(self._free)
+
+	def _span(self, x0, y0, x1, y1):
+		'''Grid cells overlapping the area [x0, x1) x [y0, y1), clipped to the screen.'''
+		size = self.cell_size
+		c0 = max(0, x0 // size)
+		c1 = min(self._cols - 1, (x1 - 1) // size)
+		r0 = max(0, y0 // size)
+		r1 = min(self._rows - 1, (y1 - 1) // size)
+		return [(col, row) for col in range(c0, c1 + 1) for row in range(r0, r1 + 1)]
+
+	def _add(self, rect):
+		self._free[rect] = None
+		x, y, w, h = rect
+		for cell in self._span(x, y, x + w, y + h):
+			self._cells.setdefault(cell, set()).add(rect)
+
+	def _discard(self, rect):
+		del self._free[rect]
+		x, y, w, h = rect
+		for cell in self._span(x, y, x + w, y + h):
+			bucket = self._cells[cell]
+			bucket.discard(rect)
+			if not bucket:
+				del self._cells[cell]
+
+	def _contained(self, rect):
+		'''True if another free rect contains `rect`.'''
+		x, y, w, h = rect
+		x1, y1 = x + w, y + h
+		# A container covers the rect's top-left corner, so it is in that cell
+		cell = (x // self.cell_size, y // self.cell_size)
+		for kx, ky, kw, kh in self._cells.get(cell, ()):
+			if kx <= x and ky <= y and x1 <= kx + kw and y1 <= ky + kh:
+				return True
+		return False
+
+	def occupy(self, x, y, width, height):
+		'''Remove a rect from the free space (coordinates are rounded outwards).'''
+		ox0, oy0 = math.floor(x), math.floor(y)
+		ox1, oy1 = math.ceil(x + width), math.ceil(y + height)
+		if ox1 <= ox0 or oy1 <= oy0:
+			return
+
+		hit = set()
+		for cell in self._span(ox0, oy0, ox1, oy1):
+			for fx, fy, fw, fh in self._cells.get(cell, ()):
+				if ox0 < fx + fw and ox1 > fx and oy0 < fy + fh and oy1 > fy:
+					hit.add((fx, fy, fw, fh))
+		if not hit:
+			return
+
+		pieces = set()
+		for rect in hit:
+			self._discard(rect)
+			fx, fy, fw, fh = rect
+			fx1, fy1 = fx + fw, fy + fh
+			if ox0 > fx:
+				pieces.add((fx, fy, ox0 - fx, fh))
+			if ox1 < fx1:
+				pieces.add((ox1, fy, fx1 - ox1, fh))
+			if oy0 > fy:
+				pieces.add((fx, fy, fw, oy0 - fy))
+			if oy1 < fy1:
+				pieces.add((fx, oy1, fw, fy1 - oy1))
+
+		# Rects the occupied area did not touch were maximal before and a piece
+		# lies inside a rect that was, so only the pieces can be redundant.
+		# Larger pieces go first, so a piece is checked against the kept ones.
+		for piece in sorted(pieces, key=lambda r: r[2] * r[3], reverse=True):
+			if not self._contained(piece):
+				self._add(piece)
+
+	def fitting(self, width, height):
+		'''Free rects that can hold a width x height window, ordered by position.
+
+		The order only depends on the free area, not on the order rects were
+		occupied in, so a seeded choice among them is reproducible.
+		'''
+		return sorted(rect for rect in self._free if rect[2] >= width and rect[3] >= height)
+
+
+class PlacementEngine:
+	'''Finds a free, non-overlapping position for a new window in one query.'''
+	def __init__(self, rng=None):
+		self.rng = rng or random.Random()
+
+	def place(self, width, height, space):
+		'''Return an (x, y) position for a window in a FreeSpace, or None if it is full.
+
+		A window larger than the screen is treated as screen-sized so it still
+		gets the origin when nothing else is there. The position is not
+		occupied; the caller does that once the window is actually placed.
+		'''
+		width = min(width, space.width)
+		height = min(height, space.height)
+
+		fits = space.fitting(width, height)
+		if not fits:
+			return None
+
+		fx, fy, fw, fh = self.rng.choice(fits)
+		x = fx + self.rng.randint(0, int(fw - width))
+		y = fy + self.rng.randint(0, int(fh - height))
+		return x, y
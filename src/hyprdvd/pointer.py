@@ -0,0 +1,117 @@
+import threading
+import time
+from socket import socket, AF_UNIX, SOCK_STREAM, SHUT_RDWR
+
+from . import metrics, tracing
+from .settings import SOCKET_PATH, POINTER_PROBE_RATE, POINTER_EVENTS
+from .utils import HyprIPC
+from .events import EventParser
+
+
+def parse_cursor(out):
+	'''Parse `cursorpos` output ("<x>, <y>") into an (x, y) tuple, or None.'''
+	parts = out.replace(',', ' ').split()
+	if len(parts) < 2:
+		return None
+	try:
+		return (int(float(parts[0])), int(float(parts[1])))
+	except ValueError:
+		return None
+
+
+class PointerWatcher:
+	'''Detects user activity while the screensaver runs, off the frame loop.
+
+	A probe thread asks for `cursorpos` on its own IPC client `rate` times per
+	second and compares it with `origin`. A second thread listens on socket2
+	and reacts to focus/workspace events (`events`) immediately. Either one
+	sets `triggered`, which the animation loop waits on between frames. Pass
+	an existing threading.Event as `triggered` to share it with other stop
+	sources.
+	'''
+	def __init__(self, origin, rate=POINTER_PROBE_RATE, events=POINTER_EVENTS, event_path=None, ipc=None, triggered=None):
+		self.origin = origin
+		self.interval = 1.0 / rate if rate else None
+		self.events = frozenset(events or ())
+		self.event_path = event_path or SOCKET_PATH
+		self.ipc = ipc or HyprIPC()
+		self.triggered = triggered or threading.Event()
+		self.reason = None
+		self._stopped = threading.Event()
+		self._sock = None
+		self._threads = []
+
+	def trigger(self, reason):
+		'''Signal the animation loop to stop.'''
+		if self.reason is None:
+			self.reason = reason
+		self.triggered.set()
+
+	def start(self):
+		'''Start the probe and event threads.'''
+		if self.interval and self.origin is not None:
+			self._spawn(self._probe, 'hyprdvd-pointer')
+		if self.events:
+			try:
+				self._sock = socket(AF_UNIX, SOCK_STREAM)
+				self._sock.connect(self.event_path)
+			except OSError:
+				self._sock = None
+			else:
+				self._spawn(self._listen, 'hyprdvd-pointer-events')
+		return self
+
+	def stop(self):
+		'''Stop both threads and close the event connection.'''
+		self._stopped.set()
+		if self._sock is not None:
+			try:
+				self._sock.shutdown(SHUT_RDWR)
+			except OSError:
+				pass
+			self._sock.close()
+		for thread in self._threads:
+			thread.join(timeout=1.0)
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *_):
+		self.stop()
+
+	def _spawn(self, target, name):
+		thread = threading.Thread(target=target, name=name, daemon=True)
+		self._threads.append(thread)
+		thread.start()
+
+	def _probe(self):
+		while not self._stopped.wait(self.interval):
+			start = time.perf_counter()
+			try:
+				out = self.ipc(['cursorpos']).stdout
+				cursor = parse_cursor(out)
+			except Exception:
+				# unable to read cursor; do not treat as moved
+				continue
+			end = time.perf_counter()
+			if metrics.registry is not None:
+				metrics.registry.ipc(['cursorpos'], end - start)
+			if tracing.recorder is not None:
+				tracing.recorder.ipc(['cursorpos'], start, end, len('cursorpos'), len(out))
+			if cursor is not None and cursor != self.origin:
+				self.trigger('pointer')
+				return
+
+	def _listen(self):
+		parser = EventParser(wanted={name.encode() for name in self.events})
+		while not self._stopped.is_set():
+			try:
+				chunk = self._sock.recv(65536)
+			except OSError:
+				return
+			if not chunk:
+				return
+			events = parser.feed(chunk)
+			if events:
+				self.trigger(events[0][0])
+				return
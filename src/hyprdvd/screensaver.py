@@ -1,80 +1,177 @@
-import time
 import json
-import math
-import random
-from collections import defaultdict
+import threading
+import time
 
-from hyprdvd.settings import RESIZE
-from .utils import hyprctl
+from hyprdvd.settings import FPS_CAP, BATCH_ATTEMPTS, POINTER_PROBE_RATE
+from . import tracing
+from .utils import hyprctl, hyprctl_batch
 from .hyprDVD import HyprDVD
+from .clock import FrameClock
+from .pointer import PointerWatcher, parse_cursor
+from .hyprDVDManager import HyprDVDManager
+from .layout import solve_layout
+
+
+def _setup_commands(windows):
+	'''Dispatches that make windows float at their animation size and position.'''
+	commands = []
+	for w in windows:
+		addr = w['address']
+		commands.append(f'dispatch setfloating address:{addr}')
+		if w.get('size'):
+			commands.append(f'dispatch resizewindowpixel exact {int(w["size"][0])} {int(w["size"][1])},address:{addr}')
+		if w.get('global_at'):
+			commands.append(f'dispatch movewindowpixel exact {w["global_at"][0]} {w["global_at"][1]},address:{addr}')
+	return commands
+
+
+def _restore_commands(windows):
+	'''Dispatches that put windows back to their original size/position and tile them.
+
+	Windows are restored first, then focused and tiled from the largest to the
+	smallest original area.
+	'''
+	commands = []
+	addr_area = []
+	for w in windows:
+		addr = w['address']
+		orig_size = w.get('orig_size') or w.get('size')
+		orig_at = w.get('orig_at') or w.get('at')
+		if orig_size:
+			commands.append(f'dispatch resizewindowpixel exact {orig_size[0]} {orig_size[1]},address:{addr}')
+		if orig_at:
+			commands.append(f'dispatch movewindowpixel exact {orig_at[0]} {orig_at[1]},address:{addr}')
+		# restore floating state
+		if not w.get('floating'):
+			commands.append(f'dispatch setfloating no address:{addr}')
+
+		# compute area for ordering (fallback to animation size if orig_size missing)
+		area = 0
+		try:
+			s = orig_size or w.get('size')
+			area = int((s[0] or 0) * (s[1] or 0))
+		except Exception:
+			area = 0
+		addr_area.append((addr, area))
+
+	addr_area.sort(key=lambda x: x[1], reverse=True)
+	for addr, _ in addr_area:
+		commands.append(f'dispatch focuswindow address:{addr}')
+		commands.append(f'dispatch settiled address:{addr}')
+	return commands
+
 
+def _apply_batch(manager, windows, build, applied, tail=()):
+	'''Send `build(windows)` as one batch, re-sending for windows that did not take it.
 
-def run_screensaver(manager, poll_interval=0.02, size=None, workspaces=None, exit_on='pointer'):
+	If the batch reply reports a failure, `clients -j` is checked and only the
+	windows for which `applied(window, client)` is false are retried. Returns
+	the windows that still failed after BATCH_ATTEMPTS tries.
+	'''
+	pending = list(windows)
+	for _ in range(BATCH_ATTEMPTS):
+		if hyprctl_batch(build(pending) + list(tail)):
+			return []
+		current = {c['address']: c for c in manager.clients.refresh()}
+		pending = [w for w in pending if w['address'] in current and not applied(w, current[w['address']])]
+		if not pending:
+			return []
+	return pending
+
+
+def _query_setup(manager):
+	'''Cursor position and clients in one batch; the clients re-seed the manager's registry.
+
+	Neither can come from a cache: Hyprland sends no event for cursor motion
+	or for interactive moves and resizes, and the restore needs the real
+	geometry.
+	'''
+	out = hyprctl(['--batch', 'cursorpos;j/clients']).stdout
+	split = out.find('[')
+	if split < 0:
+		# Batch failed; ask one at a time
+		try:
+			cursor = parse_cursor(hyprctl(['cursorpos']).stdout)
+		except Exception:
+			cursor = None
+		return cursor, manager.clients.refresh()
+	return parse_cursor(out[:split]), manager.clients.refresh(out[split:])
+
+
+def _animate_shard(shard, clock, stop, errors):
+	'''Worker loop of one per-monitor shard; any failure stops the whole screensaver.'''
+	try:
+		clock.start()
+		while not stop.wait(clock.delay()):
+			shard.update_windows(clock.tick())
+	except Exception as e:
+		errors.append(e)
+		stop.set()
+
+
+def run_screensaver(manager, size=None, workspaces=None, exit_on='pointer', fps_cap=FPS_CAP, pointer_rate=POINTER_PROBE_RATE, stop=None, per_monitor=False):
 	'''Run the screensaver: save cursor and current workspace windows, float and animate them until cursor moves.
 
 	This function makes a few reasonable assumptions about available hyprctl commands:
 	- `hyprctl(['cursorpos'])` returns cursor coordinates as: "<x> <y>" or similar.
 	- `clients -j` returns a list of client dicts with keys: 'address', 'at', 'size', 'workspace', 'focused'.
 
+	With `exit_on='pointer'` a PointerWatcher probes the cursor `pointer_rate`
+	times per second on its own thread, so frames never wait on `cursorpos`.
+	`stop` is an optional threading.Event that ends the screensaver when set
+	(used by the daemon); without it, `exit_on='signal'` listens for SIGINT.
+
+	With `per_monitor`, the windows of each monitor are moved into their own
+	HyprDVDManager shard (`manager.shards`) and animated on a worker thread
+	with a frame clock at that monitor's refresh rate, so a slow or crowded
+	screen does not hold the others back. This thread then only coordinates
+	exit detection and the restore.
+
 	If those commands differ on your system we can adapt parsing accordingly.
 	'''
 
-	# 1) Save cursor position
-	saved_cursor = None
-	try:
-		out = hyprctl(['cursorpos']).stdout.strip()
-		if out:
-			parts = out.replace(',', ' ').split()
-			if len(parts) >= 2:
-				saved_cursor = (int(float(parts[0])), int(float(parts[1])))
-	except Exception:
-		# If cursor query fails, we'll still proceed but we can't detect movement
-		saved_cursor = None
+	setup_start = time.perf_counter()
 
+	# 1) Save cursor position and collect the clients; without a cursor position
+	# we still proceed but can't detect movement
+	saved_cursor, clients = _query_setup(manager)
 
 	# 2) Collect target workspaces (without switching focus) and their clients
-	clients = json.loads(hyprctl(['clients', '-j']).stdout)
-
 	def _parse_ws_arg(ws_arg):
 		return [entry.strip() for entry in ws_arg.split(',') if entry.strip()]
 
-	def _resolve_workspace(token, workspace_list):
+	workspace_list = None
+	def _resolve_workspace(token):
+		nonlocal workspace_list
 		try:
 			return int(token)
 		except ValueError:
-			for ws in workspace_list:
-				if str(ws.get('id')) == token or ws.get('name') == token:
-					return ws.get('id')
+			pass
+		# Only names need `workspaces -j`
+		if workspace_list is None:
+			try:
+				workspace_list = json.loads(hyprctl(['workspaces', '-j']).stdout)
+			except Exception:
+				workspace_list = []
+		for ws in workspace_list:
+			if str(ws.get('id')) == token or ws.get('name') == token:
+				return ws.get('id')
 		return None
 
-	try:
-		workspaces_json = json.loads(hyprctl(['workspaces', '-j']).stdout)
-	except Exception:
-		workspaces_json = []
-
-	try:
-		monitors = json.loads(hyprctl(['monitors', '-j']).stdout)
-	except Exception:
-		monitors = []
+	topology = manager.topology
 
 	ws_ids = []
 	if workspaces:
 		requested = _parse_ws_arg(workspaces)
 		for token in requested:
-			resolved = _resolve_workspace(token, workspaces_json)
+			resolved = _resolve_workspace(token)
 			if resolved is not None:
 				ws_ids.append(resolved)
 			else:
 				print(f'Warning: workspace {token} not found; ignoring')
 		ws_ids = list(dict.fromkeys(ws_ids))
 	else:
-		for monitor in monitors:
-			try:
-				wsid = monitor['activeWorkspace']['id']
-			except Exception:
-				continue
-			ws_ids.append(wsid)
-		ws_ids = list(dict.fromkeys(ws_ids))
+		ws_ids = topology.visible_workspaces()
 
 	# Fallback: active workspace only (JSON)
 	if not ws_ids:
@@ -100,290 +197,148 @@ def run_screensaver(manager, poll_interval=0.02, size=None, workspaces=None, exi
 	ws_geom = {}    # ws_id -> (screen_w, screen_h) in pixels, rotation-aware, scale-compensated
 	ws_origin = {}  # ws_id -> (origin_x, origin_y) in global compositor coordinates
 
-	for m in monitors:
-		try:
-			wsid = m['activeWorkspace']['id']
-		except Exception:
-			continue
-
-		try:
-			scale = float(m.get('scale', 1)) or 1.0
-		except Exception:
-			scale = 1.0
-
-		try:
-			width = int(float(m['width']) / scale)
-			height = int(float(m['height']) / scale)
-		except Exception:
-			continue
-
-		if m.get('transform') in (1, 3, 5, 7):
-			width, height = height, width
-
-		ws_geom[wsid] = (max(1, width), max(1, height))
-		ws_origin[wsid] = (int(m.get('x', 0)), int(m.get('y', 0)))
+	for wsid in ws_ids:
+		geometry = topology.workspace_geometry(wsid)
+		if geometry is not None:
+			ws_geom[wsid] = geometry[:2]
+			ws_origin[wsid] = geometry[2:]
 
 	# fallbacks in case monitor info is missing
-	fallback_w, fallback_h = (1920, 1080)
-	fallback_ox, fallback_oy = (0, 0)
-	if monitors:
-		m0 = monitors[0]
-		try:
-			scale = float(m0.get('scale', 1)) or 1.0
-		except Exception:
-			scale = 1.0
-		try:
-			width = int(float(m0['width']) / scale)
-			height = int(float(m0['height']) / scale)
-		except Exception:
-			width, height = fallback_w, fallback_h
-		if m0.get('transform') in (1, 3, 5, 7):
-			width, height = height, width
-		fallback_w, fallback_h = (max(1, width), max(1, height))
-		fallback_ox, fallback_oy = (int(m0.get('x', 0)), int(m0.get('y', 0)))
-
-
+	fallback_w, fallback_h, fallback_ox, fallback_oy = topology.fallback_geometry()
 
 	# 3) Save original states and make windows floating
 	saved_windows = []
 
-	# Compute non-overlapping sizes/positions for all windows in the workspace.
-	# We'll place them on a grid (cols x rows) that fits all windows. Each window
-	# will be at most a ratio set in settings of the screen size and centered within its cell.
-	computed = {}
+	# One shard per monitor (keyed by its origin) in per-monitor mode, else the manager itself
+	shards = {}
+	def _manager_for(wsid):
+		if not per_monitor:
+			return manager
+		origin = ws_origin.get(wsid, (fallback_ox, fallback_oy))
+		if origin not in shards:
+			shards[origin] = HyprDVDManager(size=manager.window_size, topology=topology, collisions=manager.collisions,
+				profile=manager.profile, pipelined=manager.pipeline is not None, clients=manager.clients)
+			manager.shards.append(shards[origin])
+		return shards[origin]
+
+	# Non-overlapping animation rects for every workspace, keeping each window's aspect ratio
+	layouts = {}
 	for wsid, ws_clients in clients_by_ws.items():
-		N = len(ws_clients)
-		if N == 0:
-			continue
-
 		sw, sh = ws_geom.get(wsid, (fallback_w, fallback_h))
-		sw = max(1, sw)
-		sh = max(1, sh)
+		layouts.update(solve_layout(ws_clients, sw, sh, max_size=size))
 
-		if sh > 0:
-			cols = max(1, math.ceil(math.sqrt(N * (sw / sh))))
-		else:
-			cols = max(1, math.ceil(math.sqrt(N)))
-		rows = max(1, math.ceil(N / cols))
-
-		cell_w = max(1, int(sw / cols))
-		cell_h = max(1, int(sh / rows))
-
-		max_w = min(int(sw * RESIZE), int(cell_w * 0.9))
-		max_h = min(int(sh * RESIZE), int(cell_h * 0.9))
-
-		for idx, client in enumerate(ws_clients):
-			col = idx % cols
-			row = idx // cols
-			w = max(1, max_w)
-			h = max(1, max_h)
-			x = int(col * cell_w + (cell_w - w) / 2)
-			y = int(row * cell_h + (cell_h - h) / 2)
-			computed[client.get('address')] = {
-				'size': [w, h],
-				'at': [x, y],
-				'cell_w': cell_w,
-				'cell_h': cell_h,
-			}
-
-	# assign computed sizes/positions when making windows floating
-	placed_rects = defaultdict(list)  # track rects per workspace to prevent overlaps
 	for c in clients_in_ws:
 		wsid = c['workspace']['id']
 		sw, sh = ws_geom.get(wsid, (fallback_w, fallback_h))  # per-monitor width/height
 
 		addr = c.get('address')
-		if not addr:
+		if addr not in layouts:
 			continue
 
-		comp = computed.get(addr, {})
-
-		if comp.get('size'):
-			anim_size = list(comp['size'])
-		else:
-			anim_size = list(c.get('size') or [int(sw * RESIZE), int(sh * RESIZE)])
-
-		if size:
-			try:
-				anim_size[0] = min(anim_size[0], size[0])
-				anim_size[1] = min(anim_size[1], size[1])
-			except Exception:
-				pass
-
-		base_at = comp.get('at')
-		if base_at is not None:
-			base_at = list(base_at)
-		else:
-			try:
-				cx, cy = c.get('at', [0, 0])
-				ox, oy = ws_origin.get(wsid, (fallback_ox, fallback_oy))
-				base_at = [int(cx) - ox, int(cy) - oy]
-			except Exception:
-				base_at = [0, 0]
-
-		cell_w = max(1, int(comp.get('cell_w', sw)))
-		cell_h = max(1, int(comp.get('cell_h', sh)))
-
-		anim_at = list(base_at)
-		if base_at:
-			# Use a unique random generator per window to avoid same offsets
-			rng = random.Random(str(addr))
-			w, h = int(anim_size[0]), int(anim_size[1])
-			# Keep max offset within the free margin of the cell to avoid crossing cells
-			max_dx = max(0, int((cell_w - w) / 2))
-			max_dy = max(0, int((cell_h - h) / 2))
-			retries = 0
-			rects_for_ws = placed_rects[wsid]
-			while True:
-				dx = rng.randint(-max_dx, max_dx)
-				dy = rng.randint(-max_dy, max_dy)
-				x = base_at[0] + dx
-				y = base_at[1] + dy
-				# Ensure window is fully on screen
-				if not (0 <= x <= sw - w and 0 <= y <= sh - h):
-					retries += 1
-					if retries > 50:
-						# fallback to clamped position if too many retries
-						x = min(max(0, x), sw - w)
-						y = min(max(0, y), sh - h)
-						anim_at = [x, y]
-						break
-					continue
-
-				# Check against already placed rects to avoid overlaps within workspace
-				overlap = False
-				for rx, ry, rw, rh in rects_for_ws:
-					if not (x + w <= rx or rx + rw <= x or y + h <= ry or ry + rh <= y):
-						overlap = True
-						break
-				if not overlap:
-					anim_at = [x, y]
-					break
-				retries += 1
-				if retries > 50:
-					# give up on jitter and use base position instead
-					anim_at = list(base_at)
-					break
+		x, y, w, h = layouts[addr]
+		anim_at = [x, y]
+		anim_size = [w, h]
+		# convert RELATIVE (monitor-local) to GLOBAL (compositor)
+		ox, oy = ws_origin.get(wsid, (fallback_ox, fallback_oy))
+		global_at = (int(x + ox), int(y + oy))
 
 		# save minimal state including original client values so we can restore them
 		saved_windows.append({
 			'address': addr,
 			'at': anim_at,
+			'global_at': global_at,
 			'size': anim_size,
 			'orig_at': c.get('at'),
 			'orig_size': c.get('size'),
 			'floating': c.get('floating', False),
 		})
 
-		# Make floating and ensure size/position match animation values
-		hyprctl(['dispatch', 'setfloating', f'address:{addr}'])
-		if anim_size:
-			hyprctl(['dispatch', 'resizewindowpixel', 'exact', str(int(anim_size[0])), str(int(anim_size[1])), f',address:{addr}'])
-		# Ensure we have a valid anim_at even if base_at wasn't available
-		if not base_at:
-			# fallback to client position or origin
-			anim_at = list(c.get('at') or [0, 0])
-			# clamp to screen
-			try:
-				w, h = int(anim_size[0]), int(anim_size[1])
-				anim_at[0] = min(max(0, int(anim_at[0])), max(0, sw - w))
-				anim_at[1] = min(max(0, int(anim_at[1])), max(0, sh - h))
-			except Exception:
-				pass
-		if anim_at:
-			# convert RELATIVE (monitor-local) to GLOBAL (compositor)
-			ox, oy = ws_origin.get(wsid, (fallback_ox, fallback_oy))
-			gx = int(anim_at[0] + ox)
-			gy = int(anim_at[1] + oy)
-			hyprctl(['dispatch', 'movewindowpixel', 'exact', str(gx), str(gy), f',address:{addr}'])
-			# remember rect to avoid overlaps for next windows
-			placed_rects[wsid].append((anim_at[0], anim_at[1], int(anim_size[0]), int(anim_size[1])))
-
 		# Add to manager so it will be animated, pass pixel size and initial position to HyprDVD
-		inst = HyprDVD.from_client(c, manager, size=anim_size, at=anim_at)
+		inst = HyprDVD.from_client(c, manager, size=anim_size, at=anim_at, setup=False)
 		inst.screen_width  = sw
 		inst.screen_height = sh
 		inst.offset_x, inst.offset_y = ws_origin.get(wsid, (fallback_ox, fallback_oy))
-		manager.windows.append(inst)
-
-	if not manager.windows:
+		_manager_for(wsid).track_window(inst)
+
+	# Make every window floating at its animation size/position in one round trip
+	failed = _apply_batch(manager, saved_windows, _setup_commands,
+		lambda w, client: client.get('floating'))
+	for w in failed:
+		print(f'Warning: could not float window {w["address"]}')
+	# Sizes changed underneath the registry; pick them up on the first frame
+	manager.clients.mark_stale()
+
+	window_count = sum(manager.window_counts().values())
+	if not window_count:
 		print('No windows found in current workspace to animate')
 		return
 
-	print(f'Running screensaver on workspaces {ws_ids} with {len(manager.windows)} windows')
-
-	# Choose exit behavior
-	stop_requested = False
-	if exit_on == 'signal':
-		import signal
-		def _sigint(*_):
-			nonlocal stop_requested
-			stop_requested = True
-		signal.signal(signal.SIGINT, _sigint)
-
-	# 4) Animate until cursor moves
+	print(f'Running screensaver on workspaces {ws_ids} with {window_count} windows')
+
+	# Choose exit behavior: the watcher (pointer), SIGINT (signal) or the caller sets `stop`
+	watcher = None
+	if stop is None:
+		stop = threading.Event()
+		if exit_on == 'signal':
+			import signal
+			signal.signal(signal.SIGINT, lambda *_: stop.set())
+	if exit_on == 'pointer':
+		watcher = PointerWatcher(saved_cursor, rate=pointer_rate, triggered=stop).start()
+
+	# 4) Animate until stopped, one frame per refresh of the fastest monitor,
+	# or one worker per monitor at its own refresh rate
+	workers = []
+	errors = []
+	# Lower compositor load for the whole run; the snapshot is restored in `finally`
+	manager.profile.acquire()
+	animate_start = time.perf_counter()
+	if tracing.recorder is not None:
+		tracing.recorder.span('setup', 'screensaver', setup_start, animate_start, {'windows': window_count})
 	try:
-		while True:
-			# check cursor movement
-			moved = False
-			if exit_on == 'pointer' and saved_cursor is not None:
-				try:
-					out = hyprctl(['cursorpos']).stdout.strip()
-					parts = out.replace(',', ' ').split()
-					if len(parts) >= 2:
-						cur = (int(float(parts[0])), int(float(parts[1])))
-						if cur != saved_cursor:
-							moved = True
-				except Exception:
-					# unable to read cursor; do not treat as moved
-					pass
-
-			if moved or stop_requested:
-				print('Cursor moved — restoring windows and exiting screensaver')
-				break
-
-			# otherwise update animation
-			manager.update_windows()
-			time.sleep(poll_interval)
+		if manager.shards:
+			for shard in manager.shards:
+				rate = topology.workspace_refresh_rate(shard.windows[0].workspace_id)
+				clock = FrameClock(fps=rate, fps_cap=fps_cap)
+				worker = threading.Thread(target=_animate_shard, args=(shard, clock, stop, errors),
+					name='hyprdvd-monitor', daemon=True)
+				workers.append(worker)
+				worker.start()
+			stop.wait()
+		else:
+			clock = FrameClock.from_topology(topology, fps_cap=fps_cap)
+			clock.start()
+			while not stop.wait(clock.delay()):
+				manager.update_windows(clock.tick())
+		for e in errors:
+			print(f'Animation worker failed: {e}')
+		if watcher is not None and watcher.reason:
+			print(f'Activity detected ({watcher.reason}) — restoring windows and exiting screensaver')
+		else:
+			print('Stop requested — restoring windows and exiting screensaver')
 	finally:
+		restore_start = time.perf_counter()
+		stop.set()
+		for worker in workers:
+			worker.join()
+		# Moves still queued on a dispatch pipeline must land before the restore
+		for shard in [manager] + manager.shards:
+			if shard.pipeline is not None:
+				shard.pipeline.close()
+		manager.shards.clear()
+		if watcher is not None:
+			watcher.stop()
 		# 5) restore saved windows to original positions/sizes/floating state
-		# Restore window sizes/positions and floating state to their ORIGINAL
-		# values (orig_at / orig_size) when available, while keeping them
-		# floating. Collect original area so we can tile largest->smallest.
-		batch_cmds = []
-		addr_area = []
-		for w in saved_windows:
-			addr = w['address']
-			orig_size = w.get('orig_size') or w.get('size')
-			orig_at = w.get('orig_at') or w.get('at')
-			if orig_size:
-				hyprctl(['dispatch', 'resizewindowpixel', 'exact', str(orig_size[0]), str(orig_size[1]), f',address:{addr}'])
-			if orig_at:
-				hyprctl(['dispatch', 'movewindowpixel', 'exact', str(orig_at[0]), str(orig_at[1]), f',address:{addr}'])
-			# restore floating state
-			if not w.get('floating'):
-				hyprctl(['dispatch', 'setfloating', 'no', f'address:{addr}'])
-
-			# compute area for ordering (fallback to animation size if orig_size missing)
-			area = 0
-			try:
-				s = orig_size or w.get('size')
-				area = int((s[0] or 0) * (s[1] or 0))
-			except Exception:
-				area = 0
-			addr_area.append((addr, area))
-
-		# Now tile from largest to smallest by building a batched list of
-		# focus+settiled commands in that order and executing them once.
-		if addr_area:
-			addr_area.sort(key=lambda x: x[1], reverse=True)
-			for addr, _ in addr_area:
-				batch_cmds.append(f'dispatch focuswindow address:{addr}')
-				batch_cmds.append(f'dispatch settiled address:{addr}')
-			if batch_cmds:
-				hyprctl(['--batch', ';'.join(batch_cmds)])
+		# and tile them, all in one batch together with the cursor restore.
+		tail = []
+		if saved_cursor is not None:
+			tail.append(f'dispatch movecursor {saved_cursor[0]} {saved_cursor[1]}')
+		failed = _apply_batch(manager, saved_windows, _restore_commands,
+			lambda w, client: not client.get('floating'), tail=tail)
+		for w in failed:
+			print(f'Warning: could not restore window {w["address"]}')
+		manager.profile.release()
+		if tracing.recorder is not None:
+			tracing.recorder.span('animate', 'screensaver', animate_start, restore_start)
+			tracing.recorder.span('restore', 'screensaver', restore_start, time.perf_counter())
 
 		print('Restored windows. Screensaver finished.')
-		# set the cursor back to the saved position if available
-		if saved_cursor is not None:
-			hyprctl(['dispatch', 'movecursor', str(saved_cursor[0]), str(saved_cursor[1])])
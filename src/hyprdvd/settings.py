@@ -2,6 +2,53 @@ import os
 
 __version__ = '0.5.0'
 
-SOCKET_PATH = f'{os.environ['XDG_RUNTIME_DIR']}/hypr/{os.environ['HYPRLAND_INSTANCE_SIGNATURE']}/.socket2.sock'
+# Missing variables only matter once a socket is used, so headless modes (--simulate) still import
+RUNTIME_DIR = os.environ.get('XDG_RUNTIME_DIR', '/tmp')
+INSTANCE_SIGNATURE = os.environ.get('HYPRLAND_INSTANCE_SIGNATURE', '')
 
-RESIZE = 0.4
\ No newline at end of file
+HYPR_DIR = os.path.join(RUNTIME_DIR, 'hypr', INSTANCE_SIGNATURE)
+
+SOCKET_PATH = os.path.join(HYPR_DIR, '.socket2.sock')
+REQUEST_SOCKET_PATH = os.path.join(HYPR_DIR, '.socket.sock')
+
+# Control socket of a resident `hyprdvd --daemon`
+CONTROL_SOCKET_PATH = os.path.join(RUNTIME_DIR, f'hyprdvd-{INSTANCE_SIGNATURE}.sock')
+
+# Original values of the options changed by PERFORMANCE_PROFILE, while it is applied
+OPTIONS_SNAPSHOT_PATH = os.path.join(RUNTIME_DIR, f'hyprdvd-{INSTANCE_SIGNATURE}-options.json')
+
+RESIZE = 0.4
+
+# Default animation speed, in pixels per second
+SPEED = 200
+
+# Upper bound for the animation frame rate (monitor refresh rate is used below it)
+FPS_CAP = 100
+
+# How often the screensaver checks whether the cursor moved, per second
+POINTER_PROBE_RATE = 20
+
+# socket2 events that count as user activity and stop the screensaver
+POINTER_EVENTS = ('activewindow', 'focusedmon', 'workspace')
+
+# How many times a screensaver setup/restore batch is sent before giving up on a window
+BATCH_ATTEMPTS = 3
+
+# Longest time step a single frame may advance the animation by, in seconds
+MAX_FRAME_TIME = 0.1
+
+# Most coalesced events kept pending between two frames; the oldest are dropped beyond that
+MAX_PENDING_EVENTS = 256
+
+# Spans kept by --trace; older ones are overwritten
+TRACE_BUFFER_SIZE = 1 << 16
+
+# Seconds between full `clients -j` reconciliations of the client registry
+RECONCILE_INTERVAL = 1.0
+
+# Compositor options lowered while windows animate (option -> value), restored afterwards
+PERFORMANCE_PROFILE = {
+	'animations:enabled': '0',
+	'decoration:blur:enabled': '0',
+	'decoration:shadow:enabled': '0',
+}
@@ -0,0 +1,142 @@
+import struct
+import sys
+import time
+from array import array
+
+from .hyprDVD import HyprDVD
+from .hyprDVDManager import HyprDVDManager
+from .topology import MonitorTopology
+
+# Trajectory file: header, then for every frame the x, y of every window as
+# little-endian float64 (frames * windows * 2 values)
+MAGIC = b'HDVDTRAJ'
+VERSION = 3
+HEADER = struct.Struct('<8sHHIIIdqIIB')
+COLLISION_MODES = ('discrete', 'continuous')
+
+
+class SimulatedTopology(MonitorTopology):
+	'''MonitorTopology over a fixed, in-memory list of monitors.'''
+	def __init__(self, monitors):
+		super().__init__()
+		self._fixed = monitors
+
+	def refresh(self):
+		return self._install(self._fixed)
+
+
+def simulated_monitors(count, width=1920, height=1080, refresh_rate=60.0):
+	'''`count` monitors side by side, showing workspaces 1..count.'''
+	return [{
+		'id': i,
+		'name': f'SIM-{i + 1}',
+		'x': i * width,
+		'y': 0,
+		'width': width,
+		'height': height,
+		'scale': 1.0,
+		'transform': 0,
+		'refreshRate': refresh_rate,
+		'activeWorkspace': {'id': i + 1, 'name': str(i + 1)},
+	} for i in range(count)]
+
+
+class Simulation:
+	'''Headless run of the manager's physics on in-memory windows, with no IPC.
+
+	Windows are created and placed like `HyprDVDManager.add_window` does,
+	drawing start directions and positions from the manager's seeded RNG, so
+	the same parameters always give the same trajectories.
+	'''
+	def __init__(self, windows=10, monitors=1, seed=0, fps=100.0, size=None, use_numpy=None, collisions='discrete'):
+		self.params = {
+			'windows': windows, 'monitors': monitors, 'seed': seed,
+			'fps': float(fps), 'size': size, 'collisions': collisions,
+		}
+		self.dt = 1.0 / float(fps)
+		topology = SimulatedTopology(simulated_monitors(monitors))
+		self.manager = HyprDVDManager(size=size, seed=seed, use_numpy=use_numpy, topology=topology, collisions=collisions)
+
+		for i in range(windows):
+			window = HyprDVD([f'{i + 1:x}', str(i % monitors + 1)], self.manager, size=size, setup=False)
+			space = self.manager.free_space(window.workspace_id, window.screen_width, window.screen_height)
+			position = self.manager.placement.place(window.window_width, window.window_height, space)
+			if position is None:
+				# No free spot left on the workspace, like a closed window in add_window
+				continue
+			window.window_x, window.window_y = position
+			window.position_synced = True
+			self.manager.track_window(window)
+
+	def positions(self):
+		'''Current x, y of every window as a flat float64 array.'''
+		frame = array('d')
+		for window in self.manager.windows:
+			frame.append(float(window.window_x))
+			frame.append(float(window.window_y))
+		return frame
+
+	def frames(self, count):
+		'''Advance `count` frames, yielding the positions after each one.'''
+		for _ in range(count):
+			self.manager.step_physics(self.dt)
+			yield self.positions()
+
+
+def write_trajectory(path, simulation, frames):
+	'''Run `frames` frames of a simulation into a trajectory file; returns frames/sec.'''
+	params = simulation.params
+	width, height = params['size'] or (0, 0)
+	start = time.perf_counter()
+	with open(path, 'wb') as f:
+		f.write(HEADER.pack(MAGIC, VERSION, params['monitors'], params['windows'],
+			len(simulation.manager.windows), frames, params['fps'], params['seed'], width, height,
+			COLLISION_MODES.index(params['collisions'])))
+		for frame in simulation.frames(frames):
+			if sys.byteorder != 'little':
+				frame.byteswap()
+			frame.tofile(f)
+	elapsed = time.perf_counter() - start
+	return frames / elapsed if elapsed else float('inf')
+
+
+def read_trajectory(path):
+	'''Return (params, frames) from a trajectory file; frames is a list of float64 arrays.'''
+	with open(path, 'rb') as f:
+		magic, version, monitors, windows, tracked, count, fps, seed, width, height, mode = HEADER.unpack(f.read(HEADER.size))
+		if magic != MAGIC or version != VERSION:
+			raise ValueError(f'{path} is not a hyprdvd trajectory file')
+		frames = []
+		for _ in range(count):
+			frame = array('d')
+			frame.fromfile(f, tracked * 2)
+			if sys.byteorder != 'little':
+				frame.byteswap()
+			frames.append(frame)
+	params = {
+		'windows': windows, 'monitors': monitors, 'seed': seed, 'fps': fps,
+		'size': (width, height) if width and height else None, 'tracked': tracked,
+		'collisions': COLLISION_MODES[mode],
+	}
+	return params, frames
+
+
+def verify_trajectory(path, tolerance=0.0, use_numpy=None):
+	'''Re-run the simulation recorded in `path` and compare it frame by frame.
+
+	Returns (first_divergent_frame or None, largest difference in pixels).
+	'''
+	params, recorded = read_trajectory(path)
+	simulation = Simulation(windows=params['windows'], monitors=params['monitors'], seed=params['seed'],
+		fps=params['fps'], size=params['size'], use_numpy=use_numpy, collisions=params['collisions'])
+	if len(simulation.manager.windows) != params['tracked']:
+		return 0, float('inf')
+
+	first = None
+	worst = 0.0
+	for index, (expected, actual) in enumerate(zip(recorded, simulation.frames(len(recorded)))):
+		diff = max((abs(a - b) for a, b in zip(expected, actual)), default=0.0)
+		worst = max(worst, diff)
+		if first is None and diff > tolerance:
+			first = index
+	return first, worst
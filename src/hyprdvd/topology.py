@@ -0,0 +1,204 @@
+import json
+import threading
+
+from .utils import hyprctl
+
+DEFAULT_GEOMETRY = (1920, 1080, 0, 0)
+
+
+def monitor_geometry(monitor):
+	'''Return (width, height, origin_x, origin_y) of a monitor in layout pixels.
+
+	Width and height are scale-compensated and swapped for rotated transforms;
+	the origin is in global compositor coordinates. Returns None if the
+	monitor dict lacks a usable size.
+	'''
+	try:
+		scale = float(monitor.get('scale', 1)) or 1.0
+	except Exception:
+		scale = 1.0
+
+	try:
+		width = int(float(monitor['width']) / scale)
+		height = int(float(monitor['height']) / scale)
+	except Exception:
+		return None
+
+	if monitor.get('transform') in (1, 3, 5, 7):
+		width, height = height, width
+
+	return (max(1, width), max(1, height), int(monitor.get('x', 0)), int(monitor.get('y', 0)))
+
+
+class MonitorTopology:
+	'''Cached monitor and workspace geometry shared by the manager and its windows.
+
+	`monitors -j` is queried lazily and the result is kept until a socket2 event
+	says the layout changed. Workspace switches and monitor focus changes are
+	applied to a copy; hotplug and workspace moves drop the cache.
+
+	One instance is read every frame by screensaver and per-monitor worker
+	threads while the event loop thread applies events, so the monitor list
+	and geometry map are built together and swapped in one assignment, and
+	readers work on the pair they got. Writers take a lock, and a query that
+	raced with an invalidation is returned to its caller but not cached.
+	'''
+	INVALIDATING_EVENTS = (
+		'monitoradded', 'monitoraddedv2', 'monitorremoved', 'monitorremovedv2',
+		'moveworkspace', 'moveworkspacev2', 'configreloaded',
+	)
+	# Events handle_event reacts to
+	EVENTS = INVALIDATING_EVENTS + ('focusedmon', 'workspace', 'workspacev2')
+
+	def __init__(self):
+		# (monitors, {ws_id: (width, height, origin_x, origin_y)}), or None;
+		# replaced as a whole, never changed in place
+		self._state = None
+		self._lock = threading.Lock()
+		self._generation = 0
+
+	def _current(self):
+		state = self._state
+		if state is None:
+			state = self.refresh()
+		return state
+
+	@property
+	def monitors(self):
+		'''The cached `monitors -j` list, queried on first use after an invalidation.'''
+		return self._current()[0]
+
+	def refresh(self):
+		'''Query `monitors -j`, rebuild the workspace geometry map and return both.'''
+		generation = self._generation
+		try:
+			monitors = json.loads(hyprctl(['monitors', '-j']).stdout)
+		except (ValueError, TypeError):
+			monitors = []
+		return self._install(monitors if isinstance(monitors, list) else [], generation)
+
+	def _install(self, monitors, generation=None):
+		'''Cache `monitors` unless the topology was invalidated since `generation`.'''
+		state = (monitors, _geometry_map(monitors))
+		with self._lock:
+			if generation is None or generation == self._generation:
+				self._state = state
+		return state
+
+	def invalidate(self):
+		'''Forget the cached topology; the next read queries Hyprland again.'''
+		with self._lock:
+			self._generation += 1
+			self._state = None
+
+	def workspace_geometry(self, workspace_id):
+		'''Geometry of the monitor showing `workspace_id`, or None if it is not visible.'''
+		monitors, geometry = self._current()
+		found = geometry.get(workspace_id)
+		if found is None and monitors:
+			# The cache may predate a change we were not told about; check once.
+			found = self.refresh()[1].get(workspace_id)
+		return found
+
+	def fallback_geometry(self):
+		'''Geometry of the first monitor, or a 1920x1080 screen at the origin.'''
+		for monitor in self.monitors[:1]:
+			geometry = monitor_geometry(monitor)
+			if geometry is not None:
+				return geometry
+		return DEFAULT_GEOMETRY
+
+	def visible_workspaces(self):
+		'''IDs of the workspaces currently shown on a monitor, in monitor order.'''
+		ws_ids = []
+		for monitor in self.monitors:
+			try:
+				ws_ids.append(monitor['activeWorkspace']['id'])
+			except Exception:
+				continue
+		return list(dict.fromkeys(ws_ids))
+
+	def workspace_refresh_rate(self, workspace_id):
+		'''Refresh rate of the monitor showing `workspace_id`, or None if unknown.'''
+		for monitor in self.monitors:
+			try:
+				if monitor['activeWorkspace']['id'] == workspace_id:
+					return float(monitor['refreshRate'])
+			except (KeyError, TypeError, ValueError):
+				continue
+		return None
+
+	def refresh_rates(self):
+		'''Refresh rates of all monitors.'''
+		rates = []
+		for monitor in self.monitors:
+			try:
+				rates.append(float(monitor['refreshRate']))
+			except (KeyError, TypeError, ValueError):
+				continue
+		return rates
+
+	def subscribe(self, dispatcher):
+		'''Keep the topology current from an EventDispatcher.'''
+		dispatcher.subscribe(self.EVENTS, self.handle_event)
+
+	def handle_event(self, event_type, event_data):
+		'''Apply a socket2 event to the cached topology.'''
+		if event_type in self.INVALIDATING_EVENTS:
+			self.invalidate()
+			return
+
+		with self._lock:
+			if self._state is None:
+				return
+			# Readers may be iterating the current list; change a copy
+			monitors = [dict(monitor) for monitor in self._state[0]]
+			known = True
+			if event_type == 'focusedmon':
+				# focusedmon>>MONNAME,WORKSPACENAME
+				if len(event_data) < 2:
+					return
+				for monitor in monitors:
+					monitor['focused'] = monitor.get('name') == event_data[0]
+					if monitor['focused']:
+						known = _set_active_workspace(monitor, event_data[1])
+			elif event_type in ('workspace', 'workspacev2'):
+				# workspace>>WORKSPACENAME, workspacev2>>WORKSPACEID,WORKSPACENAME
+				if not event_data:
+					return
+				name = event_data[-1]
+				ws_id = event_data[0] if event_type == 'workspacev2' else name
+				for monitor in monitors:
+					if monitor.get('focused'):
+						known = _set_active_workspace(monitor, name, ws_id)
+						break
+			if not known:
+				# Named/special workspace: the id is unknown, query again on next read
+				self._generation += 1
+				self._state = None
+			else:
+				self._state = (monitors, _geometry_map(monitors))
+
+
+def _set_active_workspace(monitor, name, ws_id=None):
+	'''Show a workspace on a monitor dict; False if its id is not a number.'''
+	try:
+		ws_id = int(name if ws_id is None else ws_id)
+	except ValueError:
+		return False
+	monitor['activeWorkspace'] = {'id': ws_id, 'name': name}
+	return True
+
+
+def _geometry_map(monitors):
+	'''{ws_id: geometry} of the workspaces shown on `monitors`.'''
+	geometry = {}
+	for monitor in monitors:
+		try:
+			ws_id = monitor['activeWorkspace']['id']
+		except Exception:
+			continue
+		found = monitor_geometry(monitor)
+		if found is not None:
+			geometry[ws_id] = found
+	return geometry
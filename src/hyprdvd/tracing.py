@@ -0,0 +1,88 @@
+import itertools
+import json
+import os
+import threading
+import time
+
+from .settings import TRACE_BUFFER_SIZE
+from .metrics import command_label
+
+# Active Tracer, or None; hot paths check this before taking any timestamp
+recorder = None
+
+
+class Tracer:
+	'''Fixed-size ring buffer of timed spans, written out as Chrome trace events.
+
+	All slots are allocated up front and a span only stores a tuple in the
+	next slot, so recording costs no allocation beyond that tuple and a long
+	run keeps its last `capacity` spans. `write()` produces the JSON trace
+	format that chrome://tracing and Perfetto (ui.perfetto.dev) open.
+	'''
+	def __init__(self, capacity=TRACE_BUFFER_SIZE):
+		self.capacity = capacity
+		self._spans = [None] * capacity
+		# next() on a count is atomic, so worker threads never share a slot
+		self._next = itertools.count()
+		self._origin = time.perf_counter()
+		self._pid = os.getpid()
+		self._names = {}  # thread ident -> name, kept after the thread exits
+
+	def span(self, name, category, start, end, args=None):
+		'''Record a span between two time.perf_counter() readings.'''
+		tid = threading.get_ident()
+		if tid not in self._names:
+			self._names[tid] = threading.current_thread().name
+		self._spans[next(self._next) % self.capacity] = (name, category, start, end, tid, args)
+
+	def ipc(self, cmd, start, end, sent, received):
+		'''Record one hyprctl/IPC request with its payload sizes in bytes.'''
+		self.span(command_label(cmd), 'ipc', start, end,
+			{'request_bytes': sent, 'reply_bytes': received})
+
+	def spans(self):
+		'''Recorded spans, oldest first.'''
+		count = next(self._next)
+		# Reading the counter took a slot number; nothing is stored there
+		if count <= self.capacity:
+			spans = self._spans[:count]
+		else:
+			start = count % self.capacity
+			spans = self._spans[start:] + self._spans[:start]
+		return [span for span in spans if span is not None]
+
+	def events(self):
+		'''The spans as Chrome trace "complete" events, timestamps in microseconds.'''
+		events = []
+		threads = {}
+		for name, category, start, end, tid, args in self.spans():
+			threads.setdefault(tid, len(threads) + 1)
+			event = {
+				'name': name,
+				'cat': category,
+				'ph': 'X',
+				'ts': (start - self._origin) * 1e6,
+				'dur': max(0.0, end - start) * 1e6,
+				'pid': self._pid,
+				'tid': threads[tid],
+			}
+			if args:
+				event['args'] = args
+			events.append(event)
+		for tid, number in threads.items():
+			events.append({'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': number,
+				'args': {'name': self._names.get(tid, f'thread-{number}')}})
+		return events
+
+	def write(self, path):
+		'''Write the trace as Chrome trace-event JSON.'''
+		with open(path, 'w') as f:
+			json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'}, f)
+
+
+def enable(capacity=TRACE_BUFFER_SIZE):
+	'''Turn tracing on and return the active recorder.'''
+	global recorder
+	if recorder is None:
+		recorder = Tracer(capacity)
+	return recorder
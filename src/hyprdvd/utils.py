@@ -1,10 +1,120 @@
 import subprocess
+import time
+from socket import socket, AF_UNIX, SOCK_STREAM
 
-def hyprctl(cmd):
-	'''A wrapper for the hyprctl command.'''
+from . import metrics, tracing
+from .settings import REQUEST_SOCKET_PATH
+
+
+class ReplyError(OSError):
+	'''The request reached Hyprland but its reply could not be read.'''
+
+
+class HyprIPC:
+	'''In-process client for Hyprland's request socket (.socket.sock).
+
+	Hyprland answers exactly one request per connection and then closes it, so
+	each call opens a fresh Unix socket connection. That is still orders of
+	magnitude cheaper than spawning the `hyprctl` binary. If the socket is not
+	reachable the call falls back to running `hyprctl` as a subprocess. Once
+	the request has been sent it is never sent again: Hyprland may already
+	have run it, so a reply that times out or breaks off counts as a failure.
+	'''
+	def __init__(self, path=None, timeout=1.0):
+		self.path = path or REQUEST_SOCKET_PATH
+		self.timeout = timeout
+
+	@staticmethod
+	def build_request(cmd):
+		'''Translate hyprctl-style arguments into a request socket payload.
+
+		- `['clients', '-j']` -> `j/clients`
+		- `['--batch', 'dispatch a;dispatch b']` -> `[[BATCH]]dispatch a;dispatch b`
+		- `['dispatch', 'movewindowpixel', 'exact', '1', '2', ',address:0x1']`
+		  -> `dispatch movewindowpixel exact 1 2 ,address:0x1`
+		'''
+		flags = ''
+		batch = False
+		args = []
+		for arg in cmd:
+			if arg in ('-j', '--json'):
+				flags += 'j'
+			elif arg == '--batch':
+				batch = True
+			else:
+				args.append(arg)
+
+		request = ' '.join(args)
+		if batch:
+			return f'[[BATCH]]{request}'
+		if flags:
+			return f'{flags}/{request}'
+		return request
+
+	def request(self, payload):
+		'''Send a raw payload to the request socket and return the decoded reply.
+
+		Raises OSError if the request could not be sent and ReplyError if it
+		was sent but reading the reply failed.
+		'''
+		with socket(AF_UNIX, SOCK_STREAM) as sock:
+			sock.settimeout(self.timeout)
+			sock.connect(self.path)
+			sock.sendall(payload.encode())
+			chunks = []
+			try:
+				while True:
+					chunk = sock.recv(8192)
+					if not chunk:
+						break
+					chunks.append(chunk)
+			except OSError as e:
+				raise ReplyError(f'No reply to {payload[:80]!r}: {e}') from e
+		return b''.join(chunks).decode(errors='ignore')
+
+	def __call__(self, cmd):
+		'''Run a hyprctl-style command, returning a CompletedProcess-like result.'''
+		try:
+			reply = self.request(self.build_request(cmd))
+		except ReplyError as e:
+			return subprocess.CompletedProcess(['hyprctl'] + cmd, 1, stdout='', stderr=str(e))
+		except OSError:
+			return _hyprctl_subprocess(cmd)
+		return subprocess.CompletedProcess(['hyprctl'] + cmd, 0, stdout=reply, stderr='')
+
+
+def _hyprctl_subprocess(cmd):
+	'''Run the hyprctl binary (fallback when the request socket is unavailable).'''
 	return subprocess.run(
-		['hyprctl'] + cmd, 
+		['hyprctl'] + cmd,
 		capture_output = True,
 		text = True,
 		errors = 'ignore',
 	)
+
+
+def batch_succeeded(reply, count):
+	'''True if a [[BATCH]] reply holds an "ok" for each of `count` commands.'''
+	return ''.join(reply.split()) == 'ok' * count
+
+
+_ipc = HyprIPC()
+
+def hyprctl(cmd):
+	'''A wrapper for the hyprctl command.'''
+	if metrics.registry is None and tracing.recorder is None:
+		return _ipc(cmd)
+	start = time.perf_counter()
+	result = _ipc(cmd)
+	end = time.perf_counter()
+	if metrics.registry is not None:
+		metrics.registry.ipc(cmd, end - start)
+	if tracing.recorder is not None:
+		tracing.recorder.ipc(cmd, start, end, sum(len(arg) + 1 for arg in cmd), len(result.stdout or ''))
+	return result
+
+def hyprctl_batch(commands):
+	'''Send commands as one batch request; return True if every command succeeded.'''
+	if not commands:
+		return True
+	return batch_succeeded(hyprctl(['--batch', ';'.join(commands)]).stdout, len(commands))
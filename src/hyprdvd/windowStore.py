@@ -0,0 +1,75 @@
+from collections import Counter
+
+
+class WindowStore:
+	'''Managed windows, indexed by address and by workspace.
+
+	Integer indexing follows the rows of the manager's PhysicsEngine
+	(`windows[i]` owns row `i`). Both remove by moving the last entry into
+	the freed slot, so removal is O(1) and insertion order only holds until
+	the first removal. Lookups by address, membership tests, per-workspace
+	lists (in insertion order) and counts are dictionary operations, so
+	event handlers do not scan every window.
+	'''
+	def __init__(self):
+		self._items = []
+		self._by_address = {}
+		self._by_workspace = {}  # ws_id -> {address: window}, in insertion order
+
+	def __len__(self):
+		return len(self._items)
+
+	def __iter__(self):
+		return iter(self._items)
+
+	def __getitem__(self, index):
+		return self._items[index]
+
+	def __contains__(self, item):
+		'''True for a managed window or the address of one.'''
+		if isinstance(item, str):
+			return item in self._by_address
+		return self._by_address.get(getattr(item, 'address', None)) is item
+
+	def add(self, window):
+		'''Append a window.'''
+		self._items.append(window)
+		self._by_address[window.address] = window
+		self._by_workspace.setdefault(window.workspace_id, {})[window.address] = window
+
+	def remove(self, window):
+		'''Remove a window, moving the last window into its slot like PhysicsEngine.remove.'''
+		# The window's physics row is its position in the list, so no search is
+		# needed while it is still attached to the manager's engine
+		items = self._items
+		row = getattr(window, '_row', None)
+		if row is None or row >= len(items) or items[row] is not window:
+			row = items.index(window)
+		last = items.pop()
+		if last is not window:
+			items[row] = last
+		del self._by_address[window.address]
+		on_workspace = self._by_workspace[window.workspace_id]
+		del on_workspace[window.address]
+		if not on_workspace:
+			del self._by_workspace[window.workspace_id]
+
+	def get(self, address):
+		'''The window with `address`, or None.'''
+		return self._by_address.get(address)
+
+	def on_workspace(self, workspace_id):
+		'''Windows on a workspace, in insertion order.'''
+		return list(self._by_workspace.get(workspace_id, {}).values())
+
+	def count(self, workspace_id):
+		'''Number of windows on a workspace.'''
+		return len(self._by_workspace.get(workspace_id, ()))
+
+	def workspaces(self):
+		'''IDs of the workspaces that have windows.'''
+		return list(self._by_workspace)
+
+	def counts(self):
+		'''Number of windows per workspace.'''
+		return Counter({ws_id: len(windows) for ws_id, windows in self._by_workspace.items()})
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fakehyprland import FakeHyprland  # noqa: E402
+from hyprdvd import control, daemon, eventloop, options, pointer, settings, utils  # noqa: E402
+
+# Path settings, and the modules that import them, resolved from the real
+# $XDG_RUNTIME_DIR when the package was imported
+SETTING_PATHS = {
+	'SOCKET_PATH': (settings, eventloop, pointer),
+	'REQUEST_SOCKET_PATH': (settings, utils),
+	'CONTROL_SOCKET_PATH': (settings, daemon, control),
+	'OPTIONS_SNAPSHOT_PATH': (settings, options),
+}
+
+
+@pytest.fixture
+def hypr(monkeypatch, tmp_path):
+	'''A running FakeHyprland with every hyprdvd socket and state file pointed away from the real session.'''
+	fake = FakeHyprland(monitors=2).start()
+	for name, value in fake.environ().items():
+		monkeypatch.setenv(name, value)
+	paths = {
+		'SOCKET_PATH': fake.event_path,
+		'REQUEST_SOCKET_PATH': fake.request_path,
+		'CONTROL_SOCKET_PATH': str(tmp_path / 'hyprdvd.sock'),
+		'OPTIONS_SNAPSHOT_PATH': str(tmp_path / 'hyprdvd-options.json'),
+	}
+	for name, modules in SETTING_PATHS.items():
+		for module in modules:
+			monkeypatch.setattr(module, name, paths[name])
+	monkeypatch.setattr(utils._ipc, 'path', fake.request_path)
+	yield fake
+	fake.stop()
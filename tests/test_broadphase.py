@@ -0,0 +1,58 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from hyprdvd.broadphase import BruteForceBroadphase, GridBroadphase, SweepBroadphase, np
+from hyprdvd.simulate import Simulation
+
+BROADPHASES = [GridBroadphase] + ([SweepBroadphase] if np is not None else [])
+
+
+def random_windows(rng, count):
+	return [SimpleNamespace(
+		workspace_id=rng.randint(1, 3),
+		window_x=rng.uniform(-50, 1900), window_y=rng.uniform(-50, 1060),
+		window_width=rng.randint(20, 400), window_height=rng.randint(20, 300),
+	) for _ in range(count)]
+
+
+def overlaps(a, b):
+	return (a.workspace_id == b.workspace_id and
+		a.window_x < b.window_x + b.window_width and b.window_x < a.window_x + a.window_width and
+		a.window_y < b.window_y + b.window_height and b.window_y < a.window_y + a.window_height)
+
+
+def candidate_pairs(broadphase, windows):
+	index = broadphase.build([w.workspace_id for w in windows],
+		[w.window_x for w in windows], [w.window_y for w in windows],
+		[w.window_width for w in windows], [w.window_height for w in windows])
+	return {(i, j) for i in range(len(windows)) for j in index.partners(i)}
+
+
+@pytest.mark.parametrize('broadphase', BROADPHASES)
+@pytest.mark.parametrize('seed', range(40))
+def test_finds_every_overlapping_pair(broadphase, seed):
+	rng = random.Random(seed)
+	windows = random_windows(rng, rng.randint(2, 120))
+	brute = {(i, j) for i, j in candidate_pairs(BruteForceBroadphase(), windows) if overlaps(windows[i], windows[j])}
+	found = candidate_pairs(broadphase(), windows)
+	assert all(i < j for i, j in found)
+	assert {(i, j) for i, j in found if overlaps(windows[i], windows[j])} == brute
+
+
+@pytest.mark.skipif(np is None, reason='needs NumPy')
+def test_sweep_reports_no_pair_the_grid_misses():
+	rng = random.Random(7)
+	windows = random_windows(rng, 200)
+	assert candidate_pairs(SweepBroadphase(), windows) <= candidate_pairs(GridBroadphase(), windows)
+
+
+@pytest.mark.parametrize('broadphase', BROADPHASES)
+def test_gives_the_same_trajectories_as_brute_force(broadphase):
+	grid = Simulation(windows=40, monitors=2, seed=4, size=(150, 100))
+	grid.manager.broadphase = broadphase()
+	brute = Simulation(windows=40, monitors=2, seed=4, size=(150, 100))
+	brute.manager.broadphase = BruteForceBroadphase()
+	for a, b in zip(grid.frames(200), brute.frames(200)):
+		assert a == b
@@ -0,0 +1,36 @@
+import random
+
+from hyprdvd.simulate import Simulation
+
+
+def test_fast_windows_never_overlap_or_leave_the_screen():
+	simulation = Simulation(windows=30, monitors=2, seed=2, size=(120, 90), collisions='continuous')
+	manager = simulation.manager
+	rng = random.Random(1)
+	# Up to 60 px per frame: far more than discrete steps can separate cleanly
+	for window in manager.windows:
+		window.velocity_x = rng.choice((-1, 1)) * rng.uniform(2000, 6000)
+		window.velocity_y = rng.choice((-1, 1)) * rng.uniform(2000, 6000)
+	manager.geometry_changed()
+
+	for _ in range(300):
+		manager.step_physics(0.01)
+		windows = list(manager.windows)
+		for w in windows:
+			assert -1e-6 <= w.window_x <= w.screen_width - w.window_width + 1e-6
+			assert -1e-6 <= w.window_y <= w.screen_height - w.window_height + 1e-6
+		for i, a in enumerate(windows):
+			for b in windows[i + 1:]:
+				if a.workspace_id != b.workspace_id:
+					continue
+				overlap_x = min(a.window_x + a.window_width, b.window_x + b.window_width) - max(a.window_x, b.window_x)
+				overlap_y = min(a.window_y + a.window_height, b.window_y + b.window_height) - max(a.window_y, b.window_y)
+				assert min(overlap_x, overlap_y) <= 1e-6
+	assert manager.continuous.impacts > 0
+
+
+def test_continuous_runs_are_reproducible():
+	first = Simulation(windows=20, monitors=1, seed=5, size=(150, 100), collisions='continuous')
+	second = Simulation(windows=20, monitors=1, seed=5, size=(150, 100), collisions='continuous')
+	for a, b in zip(first.frames(200), second.frames(200)):
+		assert a == b
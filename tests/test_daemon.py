@@ -0,0 +1,99 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from hyprdvd.daemon import Daemon
+
+
+@pytest.mark.parametrize('line', [
+	'start --p',          # ambiguous prefix of --pointer-rate and --per-monitor
+	'start --pointer',    # abbreviations are not accepted at all
+	'start --bogus',
+	'start --fps fast',
+	'start --exit-on never',
+	'start --size 10by10',
+])
+def test_bad_start_lines_are_answered_not_fatal(hypr, tmp_path, line):
+	daemon = Daemon(path=str(tmp_path / 'control.sock'))
+	reply = asyncio.run(daemon.command(line))
+	assert reply.startswith('error ')
+	assert daemon.session is None
+
+
+def test_unknown_command(hypr, tmp_path):
+	daemon = Daemon(path=str(tmp_path / 'control.sock'))
+	assert asyncio.run(daemon.command('frobnicate')) == 'error unknown command frobnicate'
+	assert asyncio.run(daemon.command('stop')) == 'ok not running'
+
+
+def test_window_counts_include_the_screensaver_session(hypr, tmp_path):
+	for i in range(4):
+		hypr.add_client(1 + i % 2)
+	daemon = Daemon(path=str(tmp_path / 'control.sock'))
+
+	async def run():
+		assert await daemon.command('start --exit-on signal') == 'ok started'
+		for _ in range(100):
+			if sum(daemon.window_counts().values()) == 4:
+				break
+			await asyncio.sleep(0.01)
+		counts = dict(daemon.window_counts())
+		assert await daemon.command('stop') == 'ok stopped'
+		return counts
+
+	assert asyncio.run(run()) == {1: 2, 2: 2}
+	assert not daemon.window_counts()
+
+
+def test_start_options_configure_the_session(hypr, tmp_path):
+	hypr.add_client(1)
+	daemon = Daemon(path=str(tmp_path / 'control.sock'))
+
+	async def run():
+		assert await daemon.command('start --exit-on signal --collisions continuous --seed 3 --pipeline') == 'ok started'
+		manager = daemon.session.manager
+		assert await daemon.command('stop') == 'ok stopped'
+		return manager
+
+	manager = asyncio.run(run())
+	assert manager.collisions == 'continuous'
+	assert manager.pipeline is not None
+
+
+def test_client_commands_do_not_load_the_animation(tmp_path):
+	'''--status/--stop only talk to the control socket, so they skip asyncio and NumPy.'''
+	src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+	code = ("import sys; sys.argv = ['hyprdvd', '--status']\n"
+		"from hyprdvd import main; main()\n"
+		"print(sorted(m for m in ('asyncio', 'numpy', 'hyprdvd.daemon', 'hyprdvd.physics') if m in sys.modules))")
+	env = dict(os.environ, PYTHONPATH=src, XDG_RUNTIME_DIR=str(tmp_path), HYPRLAND_INSTANCE_SIGNATURE='test')
+	out = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+	assert out.splitlines() == ['hyprdvd daemon is not running', '[]']
+
+
+def test_session_reuses_the_daemons_caches(hypr, tmp_path):
+	hypr.add_client(1)
+	hypr.add_client(2)
+	daemon = Daemon(path=str(tmp_path / 'control.sock'))
+	daemon.manager.topology.monitors
+	hypr.reset_stats()
+
+	async def run():
+		assert await daemon.command('start --exit-on signal') == 'ok started'
+		manager = daemon.session.manager
+		for _ in range(100):
+			if sum(manager.window_counts().values()) == 2:
+				break
+			await asyncio.sleep(0.01)
+		assert await daemon.command('stop') == 'ok stopped'
+		return manager
+
+	manager = asyncio.run(run())
+	assert manager.clients is daemon.manager.clients
+	assert manager.topology is daemon.manager.topology
+	# Only the cursor and client geometry are asked for; workspaces and monitors come from the caches
+	assert hypr.commands['workspaces'] == hypr.commands['monitors'] == 0
+	assert hypr.commands['cursorpos'] == 1
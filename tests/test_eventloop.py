@@ -0,0 +1,70 @@
+import asyncio
+import contextlib
+
+from hyprdvd.clock import FrameClock
+from hyprdvd.eventloop import run_events
+from hyprdvd.hyprDVDManager import HyprDVDManager
+
+
+def show_workspace(hypr, monitor, workspace_id):
+	with hypr.lock:
+		hypr.monitors[monitor]['activeWorkspace'] = {'id': workspace_id, 'name': str(workspace_id)}
+	hypr.emit('workspace', str(workspace_id))
+
+
+def test_windows_resume_when_their_workspace_is_shown_again(hypr):
+	manager = HyprDVDManager(size=(100, 80))
+	frames = []
+	update = manager.update_windows
+	manager.update_windows = lambda dt: (frames.append(dt), update(dt))
+
+	async def frames_during(seconds):
+		start = len(frames)
+		await asyncio.sleep(seconds)
+		return len(frames) - start
+
+	async def drive():
+		task = asyncio.create_task(run_events(manager, clock=FrameClock(fps=60, fps_cap=None), path=hypr.event_path))
+		while not hypr.listeners():
+			await asyncio.sleep(0.01)
+		hypr.open_window(1)
+		assert await frames_during(0.3) > 0
+
+		show_workspace(hypr, 0, 3)
+		await asyncio.sleep(0.2)
+		assert not manager.windows and manager.parked
+		assert await frames_during(0.2) == 0
+
+		show_workspace(hypr, 0, 1)
+		shown = await frames_during(0.3)
+		task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await task
+		return shown
+
+	assert asyncio.run(drive()) > 0
+	assert len(manager.windows) == 1
+
+
+def test_window_closed_while_hidden_is_forgotten(hypr):
+	manager = HyprDVDManager(size=(100, 80))
+
+	async def drive():
+		task = asyncio.create_task(run_events(manager, clock=FrameClock(fps=60, fps_cap=None), path=hypr.event_path))
+		while not hypr.listeners():
+			await asyncio.sleep(0.01)
+		address = hypr.open_window(1)
+		await asyncio.sleep(0.2)
+		show_workspace(hypr, 0, 3)
+		await asyncio.sleep(0.2)
+		assert manager.window_counts() == {1: 1}
+		hypr.close_window(address)
+		await asyncio.sleep(0.2)
+		task.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await task
+
+	asyncio.run(drive())
+	assert not manager.parked
+	assert not manager.window_counts()
+	assert not manager.profile.active
@@ -0,0 +1,54 @@
+from hyprdvd.events import EventDispatcher, EventParser
+
+
+def test_parser_joins_lines_split_across_chunks():
+	parser = EventParser()
+	assert parser.feed(b'workspace>>2\nactivewin') == [('workspace', ['2'])]
+	assert parser.feed(b'dow>>kitty,~') == []
+	assert parser.feed(b'\r\nopenwindow>>abc,1,kitty,DVD,') == [('activewindow', ['kitty', '~'])]
+	assert parser.feed(b'title\n') == [('openwindow', ['abc', '1', 'kitty', 'DVD', 'title'])]
+	assert parser.feed(b'') == []
+
+
+def test_parser_skips_unwanted_and_malformed_lines():
+	parser = EventParser(wanted={b'closewindow'})
+	chunk = b'workspace>>3\nno separator here\ncloseWindow>>x\nclosewindow>>1f\n'
+	assert parser.feed(chunk) == [('closewindow', ['1f'])]
+	# The caller may change `wanted` while the parser is in use
+	parser.wanted.add(b'fullscreen')
+	assert parser.feed(b'fullscreen>>1\n') == [('fullscreen', ['1'])]
+
+
+def test_coalesced_handlers_run_once_per_flush_with_the_latest_event():
+	dispatcher = EventDispatcher()
+	seen, immediate = [], []
+	dispatcher.subscribe(('workspace', 'focusedmon'), lambda t, d: seen.append((t, d)), coalesce=True)
+	dispatcher.subscribe('openwindow', lambda t, d: immediate.append(d[0]))
+	dispatcher.feed(b'workspace>>1\nfocusedmon>>DP-1,1\nopenwindow>>a,1,c,t\nworkspace>>2\n'
+		b'workspace>>3\nfocusedmon>>DP-2,')
+	assert immediate == ['a'] and seen == []
+	dispatcher.feed(b'5\n')
+	assert dispatcher.flush() == 2
+	# One call per event type, in the order their latest event arrived
+	assert seen == [('workspace', ['3']), ('focusedmon', ['DP-2', '5'])]
+	assert dispatcher.flush() == 0
+
+
+def test_pending_events_are_bounded():
+	dispatcher = EventDispatcher(max_pending=2)
+	seen = []
+	dispatcher.subscribe('activewindowv2', lambda t, d: seen.append(d[0]), coalesce=lambda t, d: d[0])
+	dispatcher.feed(b''.join(b'activewindowv2>>%d\n' % i for i in range(5)))
+	dispatcher.flush()
+	assert seen == ['3', '4']
+
+
+def test_unsubscribe_drops_pending_events():
+	dispatcher = EventDispatcher()
+	seen = []
+	handler = lambda t, d: seen.append(d)  # noqa: E731
+	dispatcher.subscribe('workspace', handler, coalesce=True)
+	dispatcher.feed(b'workspace>>1\n')
+	dispatcher.unsubscribe('workspace', handler)
+	assert dispatcher.flush() == 0 and seen == []
+	assert b'workspace' not in dispatcher.parser.wanted
@@ -0,0 +1,115 @@
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from hyprdvd.utils import HyprIPC, batch_succeeded
+
+
+class RecordingServer:
+	'''One-request-per-connection Unix socket server that records raw payloads.'''
+	def __init__(self, path, reply=b'ok'):
+		self.path = path
+		self.reply = reply
+		self.payloads = []
+		self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self._sock.bind(path)
+		self._sock.listen(8)
+		threading.Thread(target=self._serve, daemon=True).start()
+
+	def _serve(self):
+		while True:
+			try:
+				conn, _ = self._sock.accept()
+			except OSError:
+				return
+			with conn:
+				self.payloads.append(conn.recv(65536).decode())
+				conn.sendall(self.reply)
+
+	def close(self):
+		self._sock.close()
+
+
+@pytest.fixture
+def server(tmp_path):
+	server = RecordingServer(str(tmp_path / '.socket.sock'))
+	yield server
+	server.close()
+
+
+@pytest.mark.parametrize('cmd, payload', [
+	(['clients', '-j'], 'j/clients'),
+	(['-j', 'monitors'], 'j/monitors'),
+	(['--batch', 'dispatch a;dispatch b'], '[[BATCH]]dispatch a;dispatch b'),
+	(['dispatch', 'movewindowpixel', 'exact', '1', '2', ',address:0x1'],
+		'dispatch movewindowpixel exact 1 2 ,address:0x1'),
+	(['cursorpos'], 'cursorpos'),
+])
+def test_build_request(cmd, payload):
+	assert HyprIPC.build_request(cmd) == payload
+
+
+def test_request_frames_one_payload_per_connection(server):
+	ipc = HyprIPC(path=server.path)
+	assert ipc(['clients', '-j']).stdout == 'ok'
+	assert ipc(['--batch', 'dispatch a;dispatch b']).stdout == 'ok'
+	assert ipc(['dispatch', 'closewindow', 'address:0x1']).stdout == 'ok'
+	assert server.payloads == ['j/clients', '[[BATCH]]dispatch a;dispatch b', 'dispatch closewindow address:0x1']
+
+
+def test_request_reads_replies_larger_than_one_chunk(tmp_path):
+	reply = json.dumps([{'address': f'0x{i:x}'} for i in range(2000)]).encode()
+	server = RecordingServer(str(tmp_path / '.socket.sock'), reply=reply)
+	try:
+		assert json.loads(HyprIPC(path=server.path)(['clients', '-j']).stdout)[-1] == {'address': '0x7cf'}
+	finally:
+		server.close()
+
+
+def test_fake_hyprland_answers_json_and_batches(hypr):
+	address = hypr.add_client(1)
+	ipc = HyprIPC(path=hypr.request_path)
+	assert [c['address'] for c in json.loads(ipc(['clients', '-j']).stdout)] == [address]
+	reply = ipc(['--batch', f'dispatch setfloating address:{address};dispatch movewindowpixel exact 5 6,address:{address}'])
+	assert batch_succeeded(reply.stdout, 2)
+	assert hypr.clients[address]['at'] == [5, 6]
+
+
+def test_falls_back_to_hyprctl_when_socket_is_missing(hypr, monkeypatch):
+	monkeypatch.setenv('PATH', hypr.write_hyprctl_shim() + os.pathsep + os.environ.get('PATH', ''))
+	ipc = HyprIPC(path=os.path.join(hypr.runtime_dir, 'missing.sock'))
+	result = ipc(['monitors', '-j'])
+	assert result.args[0] == 'hyprctl'
+	assert [m['name'] for m in json.loads(result.stdout)] == ['FAKE-1', 'FAKE-2']
+
+
+def test_slow_reply_is_not_resent(tmp_path, monkeypatch):
+	'''A request that went out is not run again through hyprctl when its reply times out.'''
+	path = str(tmp_path / '.socket.sock')
+	payloads = []
+	listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	listener.bind(path)
+	listener.listen(1)
+	done = threading.Event()
+
+	def serve():
+		conn, _ = listener.accept()
+		with conn:
+			payloads.append(conn.recv(65536).decode())
+			# Answer only after the client gave up
+			done.wait(5)
+
+	threading.Thread(target=serve, daemon=True).start()
+	fallbacks = []
+	monkeypatch.setattr('hyprdvd.utils._hyprctl_subprocess', lambda cmd: fallbacks.append(cmd))
+	try:
+		result = HyprIPC(path=path, timeout=0.2)(['dispatch', 'closewindow', 'address:0x1'])
+	finally:
+		done.set()
+		listener.close()
+	assert result.returncode != 0 and result.stdout == ''
+	assert payloads == ['dispatch closewindow address:0x1']
+	assert fallbacks == []
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from hyprdvd.layout import solve_layout
+
+
+def random_clients(rng, count):
+	return [{'address': f'0x{i:x}', 'size': [rng.randint(200, 1600), rng.randint(150, 1000)]} for i in range(count)]
+
+
+@pytest.mark.parametrize('count', [1, 2, 5, 17, 60, 200])
+def test_layout_is_in_bounds_and_non_overlapping(count):
+	clients = random_clients(random.Random(count), count)
+	layout = solve_layout(clients, 1920, 1080, max_size=(600, 400))
+	assert set(layout) == {c['address'] for c in clients}
+	rects = list(layout.values())
+	for x, y, w, h in rects:
+		assert 0 <= x and 0 <= y and x + w <= 1920 and y + h <= 1080
+		assert w <= 600 and h <= 400
+	for i, (x, y, w, h) in enumerate(rects):
+		for ox, oy, ow, oh in rects[i + 1:]:
+			assert x + w <= ox or ox + ow <= x or y + h <= oy or oy + oh <= y
+
+
+def test_layout_keeps_aspect_ratios_and_ignores_client_order():
+	clients = random_clients(random.Random(1), 12) + [{'address': '0xfff', 'size': None}]
+	layout = solve_layout(clients, 2560, 1440)
+	assert solve_layout(list(reversed(clients)), 2560, 1440) == layout
+	for client in clients[:-1]:
+		_, _, w, h = layout[client['address']]
+		assert abs(w / h - client['size'][0] / client['size'][1]) < 0.05
+	# A client without a size gets the screen's aspect ratio
+	_, _, w, h = layout['0xfff']
+	assert abs(w / h - 2560 / 1440) < 0.05
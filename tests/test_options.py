@@ -0,0 +1,49 @@
+import os
+
+from hyprdvd.options import PerformanceProfile
+
+PROFILE = {'animations:enabled': '0', 'decoration:blur:enabled': '0'}
+
+
+def test_apply_and_restore(hypr, tmp_path):
+	path = str(tmp_path / 'options.json')
+	profile = PerformanceProfile(options=PROFILE, path=path)
+	profile.acquire()
+	assert hypr.options == PROFILE
+	assert os.path.exists(path)
+	profile.release()
+	assert hypr.options == {'animations:enabled': '1', 'decoration:blur:enabled': '1'}
+	assert not os.path.exists(path)
+
+
+def test_second_instance_keeps_the_first_ones_snapshot(hypr, tmp_path):
+	path = str(tmp_path / 'options.json')
+	first = PerformanceProfile(options=PROFILE, path=path)
+	second = PerformanceProfile(options=PROFILE, path=path)
+	first.acquire()
+	# The second one sees already lowered values, so it changes nothing ...
+	second.acquire()
+	second.release()
+	# ... and must not delete the first one's crash-recovery file
+	assert os.path.exists(path)
+	assert hypr.options == PROFILE
+
+	# The first process dies without restoring: the next start recovers
+	with open(path) as f:
+		saved = f.read().replace(f'"pid": {os.getpid()}', '"pid": 999999999')
+	with open(path, 'w') as f:
+		f.write(saved)
+	assert PerformanceProfile(options=PROFILE, path=path).recover() == {
+		'animations:enabled': '1', 'decoration:blur:enabled': '1'}
+	assert hypr.options == {'animations:enabled': '1', 'decoration:blur:enabled': '1'}
+	assert not os.path.exists(path)
+
+
+def test_default_paths_stay_out_of_the_real_session(hypr, tmp_path):
+	from hyprdvd.daemon import Daemon
+	from hyprdvd.pointer import PointerWatcher
+
+	assert PerformanceProfile().path.startswith(str(tmp_path))
+	assert Daemon().path.startswith(str(tmp_path))
+	watcher = PointerWatcher((0, 0))
+	assert (watcher.event_path, watcher.ipc.path) == (hypr.event_path, hypr.request_path)
@@ -0,0 +1,78 @@
+import threading
+
+from hyprdvd.pipeline import DispatchPipeline
+
+
+class SlowSender:
+	'''Records batches; each send blocks until the test releases it.'''
+	def __init__(self):
+		self.batches = []
+		self.release = threading.Semaphore(0)
+		self.started = threading.Event()
+
+	def __call__(self, commands):
+		self.started.set()
+		self.release.acquire()
+		self.batches.append(commands)
+
+
+def test_drain_sends_everything_in_order():
+	sent = []
+	pipeline = DispatchPipeline(send=sent.append)
+	for frame in range(50):
+		pipeline.submit({f'0x{i}': f'move {i} {frame}' for i in range(3)})
+		pipeline.drain()
+	assert pipeline.idle
+	assert sent == [[f'move {i} {frame}' for i in range(3)] for frame in range(50)]
+	pipeline.close()
+
+
+def test_moves_submitted_while_a_batch_is_in_flight_are_merged():
+	sender = SlowSender()
+	pipeline = DispatchPipeline(send=sender)
+	pipeline.submit({'a': 'move a 1', 'b': 'move b 1'})
+	assert sender.started.wait(1)
+	# The first batch is in flight; these wait and replace each other per window
+	pipeline.submit({'a': 'move a 2'})
+	pipeline.submit({'a': 'move a 3', 'c': 'move c 3'})
+	assert not pipeline.idle
+	sender.release.release()
+	sender.release.release()
+	assert pipeline.drain(timeout=1)
+	assert sender.batches == [['move a 1', 'move b 1'], ['move a 3', 'move c 3']]
+	assert pipeline.merged == 1 and pipeline.sent == 2
+	pipeline.close()
+
+
+def test_close_sends_what_is_pending_and_a_later_submit_restarts():
+	sender = SlowSender()
+	pipeline = DispatchPipeline(send=sender)
+	pipeline.submit({'a': 'move a 1'})
+	assert sender.started.wait(1)
+	pipeline.submit({'a': 'move a 2'})
+	for _ in range(2):
+		sender.release.release()
+	pipeline.close(timeout=1)
+	assert sender.batches == [['move a 1'], ['move a 2']]
+	sender.release.release()
+	pipeline.submit({'b': 'move b 1'})
+	assert pipeline.drain(timeout=1)
+	assert sender.batches[-1] == ['move b 1']
+	pipeline.close(timeout=1)
+
+
+def test_a_failing_send_does_not_stop_the_pipeline():
+	calls = []
+
+	def send(commands):
+		calls.append(commands)
+		if len(calls) == 1:
+			raise OSError('socket gone')
+
+	pipeline = DispatchPipeline(send=send)
+	pipeline.submit({'a': 'move a 1'})
+	assert pipeline.drain(timeout=1)
+	pipeline.submit({'a': 'move a 2'})
+	assert pipeline.drain(timeout=1)
+	assert calls == [['move a 1'], ['move a 2']]
+	pipeline.close()
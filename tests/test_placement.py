@@ -0,0 +1,51 @@
+import random
+import time
+
+from hyprdvd.placement import FreeSpace, PlacementEngine
+from hyprdvd.simulate import Simulation
+
+
+def overlapping(rects):
+	return [(a, b) for i, a in enumerate(rects) for b in rects[i + 1:]
+		if a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]]
+
+
+def placed(simulation):
+	return [(w.window_x, w.window_y, w.window_width, w.window_height) for w in simulation.manager.windows]
+
+
+def test_hundreds_of_windows_place_quickly():
+	start = time.perf_counter()
+	simulation = Simulation(windows=600, monitors=1, seed=3, size=(40, 30))
+	elapsed = time.perf_counter() - start
+	assert len(simulation.manager.windows) == 600
+	assert elapsed < 5
+	rects = placed(simulation)
+	assert all(0 <= x and 0 <= y and x + w <= 1920 and y + h <= 1080 for x, y, w, h in rects)
+	assert not overlapping(rects)
+
+
+def test_seeded_placement_is_reproducible():
+	first = placed(Simulation(windows=80, monitors=2, seed=7, size=(120, 90)))
+	second = placed(Simulation(windows=80, monitors=2, seed=7, size=(120, 90)))
+	assert first == second
+	assert placed(Simulation(windows=80, monitors=2, seed=8, size=(120, 90))) != first
+
+
+def test_incremental_free_space_matches_a_rebuild():
+	rng = random.Random(5)
+	engine = PlacementEngine(random.Random(5))
+	space = FreeSpace(800, 600)
+	rects = []
+	for _ in range(60):
+		w, h = rng.randint(10, 120), rng.randint(10, 120)
+		position = engine.place(w, h, space)
+		if position is None:
+			continue
+		rects.append((position[0] + rng.random(), position[1] + rng.random(), w, h))
+		space.occupy(*rects[-1])
+	rebuilt = FreeSpace(800, 600)
+	for rect in reversed(rects):
+		rebuilt.occupy(*rect)
+	assert sorted(space.free) == sorted(rebuilt.free)
+	assert space.fitting(20, 20) == rebuilt.fitting(20, 20)
@@ -0,0 +1,35 @@
+from hyprdvd import topology as topology_module
+from hyprdvd.topology import MonitorTopology
+
+
+def test_workspace_events_update_the_cached_layout(hypr):
+	topology = MonitorTopology()
+	assert topology.visible_workspaces() == [1, 2]
+	monitors = topology.monitors
+	topology.handle_event('focusedmon', ['FAKE-2', '2'])
+	topology.handle_event('workspace', ['5'])
+	assert topology.visible_workspaces() == [1, 5]
+	assert topology.workspace_geometry(5) == (1920, 1080, 1920, 0)
+	# Readers holding the previous list are not changed under them
+	assert [m['activeWorkspace']['id'] for m in monitors] == [1, 2]
+	topology.handle_event('workspace', ['special'])
+	assert topology._state is None
+
+
+def test_invalidation_during_a_refresh_does_not_break_the_reader(hypr, monkeypatch):
+	topology = MonitorTopology()
+	geometry = topology_module.monitor_geometry
+	calls = []
+
+	def invalidate_midway(monitor):
+		# The event loop thread drops the cache while a worker is rebuilding it
+		if not calls:
+			topology.invalidate()
+		calls.append(monitor)
+		return geometry(monitor)
+
+	monkeypatch.setattr(topology_module, 'monitor_geometry', invalidate_midway)
+	assert topology.visible_workspaces() == [1, 2]
+	# The result raced with the invalidation, so it was not cached
+	assert topology._state is None
+	assert topology.workspace_geometry(2) == (1920, 1080, 1920, 0)
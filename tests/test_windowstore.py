@@ -0,0 +1,28 @@
+import random
+
+import pytest
+
+from hyprdvd.physics import np
+from hyprdvd.simulate import Simulation
+
+
+@pytest.mark.parametrize('use_numpy', [False] + ([True] if np is not None else []))
+def test_remove_keeps_store_and_engine_rows_in_step(use_numpy):
+	sim = Simulation(windows=30, monitors=3, seed=1, size=(100, 80), use_numpy=use_numpy)
+	manager = sim.manager
+	list(sim.frames(5))
+	rng = random.Random(2)
+	while len(manager.windows) > 1:
+		window = manager.windows[rng.randrange(len(manager.windows))]
+		state = (window.window_x, window.window_y, window.velocity_x, window.velocity_y)
+		manager.windows.remove(window)
+		manager.physics.detach(window)
+		# The removed window keeps its state in its private engine
+		assert (window.window_x, window.window_y, window.velocity_x, window.velocity_y) == state
+		assert window not in manager.windows and window.address not in manager.windows
+		for row, other in enumerate(manager.windows):
+			assert other._row == row
+			assert manager.physics.owners[row] is other
+			assert manager.windows.get(other.address) is other
+		assert len(manager.physics) == len(manager.windows)
+		assert sum(manager.windows.counts().values()) == len(manager.windows)